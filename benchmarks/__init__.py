@@ -0,0 +1 @@
+""" benchmark scripts, to be run from the repository root, e.g. `python -m benchmarks.render_time` """
@@ -0,0 +1,27 @@
+""" helpers shared by the benchmark scripts """
+import io
+
+from svg_timeline.time_spacing import TimeSpacingPerMonth
+from svg_timeline.timeline import TimelinePlot, TimeArrow, Event
+from svg_timeline.timeline_geometry import TimeLineGeometry
+
+
+class DiscardingStream(io.TextIOBase):
+    """ text stream that only counts the characters written into it """
+    def __init__(self):
+        self.n_chars = 0
+
+    def write(self, text: str) -> int:
+        self.n_chars += len(text)
+        return len(text)
+
+
+def build_plot(n_events: int) -> TimelinePlot:
+    """ a one year timeline with evenly distributed events on five lanes """
+    geometry = TimeLineGeometry(start_date='2000', end_date='2001')
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(TimeArrow(major_tics=TimeSpacingPerMonth(geometry.first, geometry.last)))
+    step = (geometry.last - geometry.first) / n_events
+    for i in range(n_events):
+        plot.add_element(Event(geometry.first + i * step, f'event {i}', lane=1 + i % 5))
+    return plot
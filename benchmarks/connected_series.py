@@ -0,0 +1,29 @@
+""" Benchmark script rendering a long series of connected events in the different modes """
+import sys
+from time import perf_counter
+
+from benchmarks._common import DiscardingStream
+from svg_timeline.timeline import ConnectedEvents, TimelinePlot
+from svg_timeline.timeline_geometry import TimeLineGeometry
+
+
+def main():
+    """ render one long series per mode and print time and output size """
+    n_dates = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    geometry = TimeLineGeometry('2000', '2001')
+    step = (geometry.last - geometry.first) / n_dates
+    dates = [geometry.first + i * step for i in range(n_dates)]
+    labels = [f'sample {i}' if i % 20_000 == 0 else None for i in range(n_dates)]
+    print(f'{n_dates} dates')
+    for as_path, downsample in [(False, False), (True, False), (False, True), (True, True)]:
+        plot = TimelinePlot(geometry=geometry)
+        plot.add_element(ConnectedEvents(dates, labels, as_path=as_path, downsample=downsample))
+        stream = DiscardingStream()
+        start = perf_counter()
+        plot.write_svg(stream)
+        duration = perf_counter() - start
+        print(f'as_path={as_path!s:5} downsample={downsample!s:5}: {duration:6.3f} s ({stream.n_chars / 1e6:.2f} MB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+""" Benchmark script comparing output size and serialization time for different coordinate precisions """
+import sys
+import zlib
+from time import perf_counter
+
+from benchmarks._common import DiscardingStream, build_plot
+
+
+class CompressingStream(DiscardingStream):
+    """ text stream that counts the characters written into it and their compressed size """
+    def __init__(self):
+        super().__init__()
+        self._compressor = zlib.compressobj(level=6, wbits=31)  # gzip container
+        self.n_compressed = 0
+
+    def write(self, text: str) -> int:
+        self.n_compressed += len(self._compressor.compress(text.encode('utf-8')))
+        return super().write(text)
+
+    def close(self):
+        self.n_compressed += len(self._compressor.flush())
+        super().close()
+
+
+def main():
+    """ serialize one large plot with several precisions and print the results """
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    plot = build_plot(n_events)
+    print(f'{n_events} events')
+    for decimals in [None, 3, 1, 0]:
+        stream = DiscardingStream()
+        start = perf_counter()
+        plot.write_svg(stream, decimals=decimals)
+        duration = perf_counter() - start
+        compressing = CompressingStream()
+        plot.write_svg(compressing, decimals=decimals)
+        compressing.close()
+        print(f'decimals={str(decimals):>4}: {duration:6.2f} s, '
+              f'{stream.n_chars / 1e6:6.1f} MB, {compressing.n_compressed / 1e6:5.1f} MB gzipped')
+
+
+if __name__ == '__main__':
+    main()
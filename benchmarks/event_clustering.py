@@ -0,0 +1,24 @@
+""" Benchmark script comparing the output of dense timelines with and without event clustering """
+import sys
+from time import perf_counter
+
+from benchmarks._common import DiscardingStream, build_plot
+
+
+def main():
+    """ render the same plots with and without clustering and print time and output size """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for n_events in sizes:
+        plot = build_plot(n_events)
+        for cluster_width in [None, 5]:
+            plot.cluster_width = cluster_width
+            stream = DiscardingStream()
+            start = perf_counter()
+            plot.write_svg(stream)
+            duration = perf_counter() - start
+            print(f'{n_events:>9} events, cluster width {cluster_width}: '
+                  f'{duration:6.2f} s ({stream.n_chars / 1e6:.2f} MB)')
+
+
+if __name__ == '__main__':
+    main()
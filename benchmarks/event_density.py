@@ -0,0 +1,31 @@
+""" Benchmark script aggregating many unsorted timestamps into an EventDensity element """
+import sys
+from datetime import timedelta
+from random import Random
+from time import perf_counter
+
+from benchmarks._common import DiscardingStream
+from svg_timeline.timeline import EventDensity, TimelinePlot
+from svg_timeline.timeline_geometry import TimeLineGeometry
+
+
+def main():
+    """ count a stream of random timestamps and render the resulting plot """
+    n_timestamps = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    geometry = TimeLineGeometry('2020-01-01', '2021-01-01')
+    rng = Random(0)
+    span = (geometry.last - geometry.first).total_seconds()
+    timestamps = (geometry.first + timedelta(seconds=rng.random() * span) for _ in range(n_timestamps))
+    start = perf_counter()
+    density = EventDensity.from_timestamps(timestamps, geometry, bin_width=2)
+    print(f'{n_timestamps} timestamps counted in {perf_counter() - start:.2f} s ({len(density.counts)} bins)')
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(density)
+    stream = DiscardingStream()
+    start = perf_counter()
+    plot.write_svg(stream)
+    print(f'rendered in {(perf_counter() - start) * 1e3:.1f} ms ({stream.n_chars / 1e3:.1f} kB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+""" Benchmark script rendering many small plots that share their title and time arrow """
+import sys
+from time import perf_counter
+from typing import Optional
+
+from benchmarks._common import DiscardingStream
+from svg_timeline.time_spacing import TimeSpacingPerDay, TimeSpacingPerMonth
+from svg_timeline.timeline import Event, FragmentCache, TimeArrow, TimelinePlot, Title
+from svg_timeline.timeline_geometry import TimeLineGeometry
+
+
+def render_plots(n_plots: int, fragment_cache: Optional[FragmentCache]) -> float:
+    """ render one plot per user and return the elapsed time in seconds """
+    start = perf_counter()
+    for i_user in range(n_plots):
+        geometry = TimeLineGeometry('2020-01-01', '2021-01-01')
+        plot = TimelinePlot(geometry=geometry, fragment_cache=fragment_cache)
+        plot.add_element(Title('Team calendar'), layer=0)
+        plot.add_element(TimeArrow(major_tics=TimeSpacingPerMonth(geometry.first, geometry.last),
+                                   minor_tics=TimeSpacingPerDay(geometry.first, geometry.last)), layer=0)
+        plot.add_element(Event('2020-06-01', f'user {i_user}'))
+        plot.write_svg(DiscardingStream())
+    return perf_counter() - start
+
+
+def main():
+    """ render the plots with and without a shared fragment cache and print the results """
+    n_plots = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f'{n_plots} plots')
+    print(f'without cache: {render_plots(n_plots, None):.2f} s')
+    fragment_cache = FragmentCache()
+    elapsed = render_plots(n_plots, fragment_cache)
+    print(f'with cache:    {elapsed:.2f} s ({fragment_cache.hits} hits, {fragment_cache.misses} misses)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+""" Micro-benchmark for the per-call cost of the transformations between dates and canvas coordinates """
+from timeit import repeat
+
+from svg_timeline.timeline_geometry import TimeLineGeometry
+from svg_timeline.vectors import Vector
+
+
+def per_call(statement, number: int = 100_000) -> float:
+    """ best per-call time of the statement in microseconds """
+    return min(repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    """ measure and print the per-call cost of the geometry methods """
+    geometry = TimeLineGeometry('2000', '2010')
+    date = geometry.first.replace(year=2005, month=6)
+    coord = Vector(500, 300)
+    print(f'as_coord:          {per_call(lambda: geometry.as_coord(date, lane=2)):.2f} µs')
+    print(f'lane_normal:       {per_call(lambda: geometry.lane_normal):.2f} µs')
+    print(f'coord_to_relative: {per_call(lambda: geometry.coord_to_relative(coord)):.2f} µs')
+    print(f'coord_to_date:     {per_call(lambda: geometry.coord_to_date(coord)):.2f} µs')
+
+
+if __name__ == '__main__':
+    main()
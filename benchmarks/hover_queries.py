@@ -0,0 +1,53 @@
+""" Benchmark script for time range queries and hit testing on a plot with many elements """
+import sys
+from datetime import timedelta
+from random import Random
+from time import perf_counter
+
+from svg_timeline.timeline import Event, TimelinePlot, TimeSpan
+from svg_timeline.timeline_geometry import TimeLineGeometry
+
+
+def main():
+    """ fill a plot with events and a few long spans, then time queries against it """
+    n_elements = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_queries = 1000
+    rng = Random(0)
+    geometry = TimeLineGeometry('2000-01-01', '2020-01-01')
+    plot = TimelinePlot(geometry=geometry)
+    span = geometry.last - geometry.first
+    start = perf_counter()
+    for i_element in range(n_elements):
+        date = geometry.first + span * (i_element / n_elements)
+        if i_element % 1000 == 0:
+            plot.add_element(TimeSpan(date, date + timedelta(days=rng.uniform(1, 2000)), f'span {i_element}', lane=3))
+        else:
+            plot.add_element(Event(date, f'event {i_element}', lane=rng.choice([1, 2])))
+    print(f'{n_elements} elements added in {perf_counter() - start:.2f} s')
+
+    start = perf_counter()
+    plot.elements_between(geometry.first, geometry.first)
+    print(f'index built in {perf_counter() - start:.2f} s')
+
+    windows = [geometry.first + span * rng.random() for _ in range(n_queries)]
+    start = perf_counter()
+    n_found = sum(len(plot.elements_between(date, date + timedelta(days=1))) for date in windows)
+    elapsed = perf_counter() - start
+    print(f'elements_between: {elapsed / n_queries * 1e3:.3f} ms per query ({n_found / n_queries:.0f} elements)')
+
+    coords = [geometry.as_coord(date, lane=rng.choice([1, 2, 3])) for date in windows]
+    start = perf_counter()
+    n_hits = sum(plot.element_at(coord) is not None for coord in coords)
+    elapsed = perf_counter() - start
+    print(f'element_at:       {elapsed / n_queries * 1e3:.3f} ms per query ({n_hits} hits)')
+
+    start = perf_counter()
+    first, last = windows[0], windows[0] + timedelta(days=1)
+    extents = [(element, element.time_extent()) for element in plot.layers[1]]
+    linear = [element for element, extent in extents
+              if extent is not None and extent[0] <= last and extent[1] >= first]
+    print(f'linear scan:      {(perf_counter() - start) * 1e3:.3f} ms per query ({len(linear)} elements)')
+
+
+if __name__ == '__main__':
+    main()
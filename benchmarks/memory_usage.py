@@ -0,0 +1,49 @@
+""" Benchmark script measuring the memory needed by the SVG representation of a timeline """
+import sys
+import tracemalloc
+
+from benchmarks._common import build_plot
+from svg_timeline.svg import Line, Text, Circle, Rectangle
+from svg_timeline.vectors import Vector
+
+
+def primitive(i: int):
+    """ one of the SVG primitives, with classes as they are used by the timeline elements """
+    classes = ['time_arrow', f'c{i % 6:02}', 'major_tic', 'colored']
+    coord = Vector(i * 0.123456789, 512.3456789012345)
+    match i % 4:
+        case 0:
+            return Line(coord, Vector(coord.x, coord.y - 10), classes=classes)
+        case 1:
+            return Text(coord, f'label {i}', classes=classes)
+        case 2:
+            return Circle(coord, radius=3, classes=classes)
+        case _:
+            return Rectangle(coord, Vector(coord.x + 10, coord.y + 10), classes=classes)
+
+
+def measure(function, n: int) -> float:
+    """ the traced memory in bytes per object that stays allocated by calling the function n times """
+    tracemalloc.start()
+    objects = [function(i) for i in range(n)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current / n
+
+
+def main():
+    """ print the memory needed per SVG element and per rendered event """
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f'SVG primitive: {measure(primitive, n):7.0f} bytes per element')
+    plot = build_plot(n)
+    tracemalloc.start()
+    svg = plot.svg
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'rendered plot: {current / n:7.0f} bytes per event (group + line + circle + text)')
+    del svg
+
+
+if __name__ == '__main__':
+    main()
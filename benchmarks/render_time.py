@@ -0,0 +1,21 @@
+""" Benchmark script measuring the time needed to render timelines with many events """
+import sys
+from time import perf_counter
+
+from benchmarks._common import DiscardingStream, build_plot
+
+
+def main():
+    """ render timelines of increasing size and print the time needed """
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for n_events in sizes:
+        plot = build_plot(n_events)
+        stream = DiscardingStream()
+        start = perf_counter()
+        plot.write_svg(stream)
+        duration = perf_counter() - start
+        print(f'{n_events:>9} events: {duration:8.2f} s ({stream.n_chars / 1e6:.1f} MB)')
+
+
+if __name__ == '__main__':
+    main()
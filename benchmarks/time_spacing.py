@@ -0,0 +1,30 @@
+""" Benchmark script comparing the tic generation throughput of the time spacings across ranges
+The tics themselves are checked in test/test_time_spacing.py, this only measures their speed.
+"""
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from svg_timeline.time_spacing import TimeSpacingPerDay, TimeSpacingPerHour, TimeSpacingPerMinute, TimeSpacingPerSecond
+
+CASES = [
+    (TimeSpacingPerDay, timedelta(days=365 * 100)),
+    (TimeSpacingPerHour, timedelta(days=365 * 5)),
+    (TimeSpacingPerMinute, timedelta(days=30)),
+    (TimeSpacingPerSecond, timedelta(days=1)),
+]
+
+
+def main():
+    """ generate the dates and labels of every spacing and print the tics per second """
+    start = datetime(2000, 1, 1, 12, 34, 56)
+    for spacing_class, duration in CASES:
+        begin = perf_counter()
+        spacing = spacing_class(start, start + duration)
+        _ = spacing.dates, spacing.labels
+        elapsed = perf_counter() - begin
+        print(f'{spacing_class.__name__:<22} {len(spacing):>9} tics  {elapsed:6.3f} s  '
+              f'{len(spacing) / elapsed / 1e6:6.2f} M tics/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+""" index structure for time range queries over many elements """
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Generic, TypeVar
+
+T = TypeVar('T')
+
+
+class _Bucket:
+    """ intervals of a similar duration, sorted by their start """
+    __slots__ = ('max_duration', 'starts', 'entries', 'n_sorted')
+
+    def __init__(self, max_duration: timedelta):
+        self.max_duration = max_duration
+        self.starts: list[datetime] = []
+        self.entries: list[tuple] = []
+        self.n_sorted = 0
+
+    def sort(self) -> None:
+        """ merge the entries that were added since the last query into the sorted ones """
+        if self.n_sorted == len(self.entries):
+            return
+        if self.n_sorted == 0 or self.entries[self.n_sorted - 1][0] > self.entries[self.n_sorted][0]:
+            self.entries.sort(key=_entry_order)
+            self.starts = [entry[0] for entry in self.entries]
+        else:
+            # the typical case of chronologically added intervals: the new entries are appended
+            tail = sorted(self.entries[self.n_sorted:], key=_entry_order)
+            if tail[0][0] >= self.entries[self.n_sorted - 1][0]:
+                self.entries[self.n_sorted:] = tail
+                self.starts += [entry[0] for entry in tail]
+            else:
+                self.entries.sort(key=_entry_order)
+                self.starts = [entry[0] for entry in self.entries]
+        self.n_sorted = len(self.entries)
+
+
+def _entry_order(entry: tuple) -> tuple[datetime, int]:
+    return entry[0], entry[1]
+
+
+class IntervalIndex(Generic[T]):
+    """ index of items with a closed time interval each
+    The intervals are grouped into buckets by the magnitude of their duration,
+    and each bucket is sorted by start. A query only needs one binary search per bucket
+    and only visits intervals that start at most one bucket duration before the queried range,
+    which gives O(log n + k) queries independent of a few very long intervals.
+    Adding an item is O(1); the buckets are sorted on the next query.
+    """
+    def __init__(self):
+        self._buckets: dict[int, _Bucket] = {}
+        self._n_items = 0
+
+    def __len__(self) -> int:
+        return self._n_items
+
+    def add(self, start: datetime, end: datetime, item: T) -> None:
+        """ add an item that covers the time from start to end (both included) """
+        if end < start:
+            raise ValueError("the end of an interval can not be before its start")
+        # bucket n contains all durations below 2**n microseconds
+        n_bucket = ((end - start) // _MICROSECOND).bit_length()
+        bucket = self._buckets.get(n_bucket)
+        if bucket is None:
+            max_duration = timedelta(microseconds=2**n_bucket) if n_bucket else timedelta(0)
+            bucket = self._buckets[n_bucket] = _Bucket(max_duration)
+        bucket.entries.append((start, self._n_items, end, item))
+        self._n_items += 1
+
+    def overlapping(self, start: datetime, end: datetime) -> list[T]:
+        """ all items whose interval overlaps with the range from start to end,
+        in the order in which they were added
+        """
+        matches = []
+        for bucket in self._buckets.values():
+            bucket.sort()
+            try:
+                lower = bisect_left(bucket.starts, start - bucket.max_duration)
+            except OverflowError:
+                lower = 0
+            upper = bisect_right(bucket.starts, end)
+            matches += [entry for entry in bucket.entries[lower:upper] if entry[2] >= start]
+        matches.sort(key=_insertion_order)
+        return [entry[3] for entry in matches]
+
+
+def _insertion_order(entry: tuple) -> int:
+    return entry[1]
+
+
+_MICROSECOND = timedelta(microseconds=1)
@@ -55,7 +55,9 @@ class KnownClasses(Enum):
     Title = svg_timeline.timeline.Title
     TimeArrow = svg_timeline.timeline.TimeArrow
     Event = svg_timeline.timeline.Event
+    EventCluster = svg_timeline.timeline.EventCluster
     ConnectedEvents = svg_timeline.timeline.ConnectedEvents
+    EventDensity = svg_timeline.timeline.EventDensity
     DatedImage = svg_timeline.timeline.DatedImage
     TimeSpan = svg_timeline.timeline.TimeSpan
     TimeSpacingPerMillennia = tls.TimeSpacingPerMillennia
@@ -68,6 +70,7 @@ class KnownClasses(Enum):
     TimeSpacingPerHour = tls.TimeSpacingPerHour
     TimeSpacingPerMinute = tls.TimeSpacingPerMinute
     TimeSpacingPerSecond = tls.TimeSpacingPerSecond
+    TimeSpacingEvery = tls.TimeSpacingEvery
     Path = Path
 
 
@@ -92,6 +95,23 @@ class TimeLineEncoder(JSONEncoder):
                 "end_date": o.last,
                 "settings": o.settings,
             }
+        if isinstance(o, tls.TimeSpacingEvery):
+            return {
+                "type": KnownClasses(o.__class__).name,
+                "start_date": o.start_date,
+                "end_date": o.end_date,
+                "unit": o.unit,
+                "step": o.step,
+                "alignment": o.alignment,
+                "max_tics": o.max_tics,
+            }
+        if isinstance(o, tls.IndexedTimeSpacing):
+            return {
+                "type": KnownClasses(o.__class__).name,
+                "start_date": o.start_date,
+                "end_date": o.end_date,
+                "max_tics": o.max_tics,
+            }
         if isinstance(o, tls.TimeSpacing):
             return {
                 "type": KnownClasses(o.__class__).name,
@@ -1,38 +1,42 @@
 """ helper module to simplify notation in scripts """
 import re
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+
+# dates with optional time, e.g. '1987', '1987-09', '1987-09-23T03' or '1987-09-23T03:23:45'
+_DATE_SHORTHAND = re.compile(
+    r'([0-9]{4})(?:-([0-9]{2})(?:-([0-9]{2})(?:T([0-9]{2})(?::([0-9]{2})(?::([0-9]{2}))?)?)?)?)?'
+)
+# times on the current day, e.g. '13:43' or '13:43:52'
+_TIME_SHORTHAND = re.compile(r'([0-9]{2}):([0-9]{2})(?::([0-9]{2}))?')
 
 
 def dt(datetime_shorthand: str) -> datetime:
     """ factory function for datetime objects that can interpret various shorthand notations """
-    if re.match(r'^\d\d\d\d$', datetime_shorthand):
-        # just the year
-        return datetime.fromisoformat(f'{datetime_shorthand}-01-01')
-    if re.match(r'^\d\d\d\d-\d\d$', datetime_shorthand):
-        # year and month
-        return datetime.fromisoformat(f'{datetime_shorthand}-01')
-    if re.match(r'^\d\d\d\d-\d\d-\d\d$', datetime_shorthand):
-        # iso date
-        return datetime.fromisoformat(datetime_shorthand)
-    if re.match(r'^\d\d\d\d-\d\d-\d\dT\d\d$', datetime_shorthand):
-        # iso date + hour
-        return datetime.fromisoformat(f'{datetime_shorthand}:00:00')
-    if re.match(r'^\d\d\d\d-\d\d-\d\dT\d\d:\d\d$', datetime_shorthand):
-        # iso date + hour:minute
-        return datetime.fromisoformat(f'{datetime_shorthand}:00')
-    if re.match(r'^\d\d\d\d-\d\d-\d\dT\d\d:\d\d:\d\d$', datetime_shorthand):
-        # iso date + time
-        return datetime.fromisoformat(datetime_shorthand)
-    # default to today
-    year = datetime.today().year
-    month = datetime.today().month
-    day = datetime.today().day
-    if re.match(r'^\d\d:\d\d$', datetime_shorthand):
-        # hour and minutes
-        hour, minutes = [int(part) for part in datetime_shorthand.split(':')]
-        return datetime(year, month, day, hour, minutes)
-    if re.match(r'^\d\d:\d\d:\d\d$', datetime_shorthand):
-        # hour, minutes and seconds
-        hour, minutes, seconds = [int(part) for part in datetime_shorthand.split(':')]
-        return datetime(year, month, day, hour, minutes, seconds)
-    raise ValueError(f"No known shorthand pattern matches '{datetime_shorthand}'")
+    date = _parse_date_shorthand(datetime_shorthand)
+    if date is not None:
+        return date
+    match = _TIME_SHORTHAND.fullmatch(datetime_shorthand)
+    if match is None:
+        raise ValueError(f"No known shorthand pattern matches '{datetime_shorthand}'")
+    # times refer to the current day, so they are not cached
+    today = datetime.today()
+    hour, minute, second = (int(part or 0) for part in match.groups())
+    return datetime(today.year, today.month, today.day, hour, minute, second)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_shorthand(datetime_shorthand: str) -> Optional[datetime]:
+    """ the datetime of a shorthand that contains a date, None for other shorthands """
+    match = _DATE_SHORTHAND.fullmatch(datetime_shorthand)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second = match.groups()
+    return datetime(int(year), int(month or 1), int(day or 1), int(hour or 0), int(minute or 0), int(second or 0))
+
+
+def as_datetime(date: datetime | str) -> datetime:
+    """ return datetime objects unchanged and interpret strings as shorthand notation (see dt) """
+    return date if isinstance(date, datetime) else dt(date)
@@ -1,29 +1,97 @@
 """ base classes for creating SVG files """
+import gzip
+import io
 import math
+import re
+import sys
 from base64 import b64encode
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
 from html import escape
 from mimetypes import guess_type
 from pathlib import Path
-from textwrap import indent
-from typing import Optional, Self
+from threading import Lock
+from typing import Optional, Self, TextIO, cast
 
 from svg_timeline.svg_style_defaults import DEFAULT_CSS, ColorPalette, DEFAULT_COLORS
 from svg_timeline.vectors import Vector
 
 
 _INDENT = 2 * ' '
+_SELECTOR_SEPARATOR = re.compile(r'\s*,\s*')
+_SIMPLE_SELECTOR = re.compile(r'([A-Za-z][\w-]*|\*)?((?:\.[\w-]+)*)')
+
+
+def stream_writer(stream) -> Callable[[str], object]:
+    """ return a function that writes strings into the given text or binary stream
+    (binary streams receive the UTF-8 encoded text)
+    """
+    if isinstance(stream, io.TextIOBase):
+        return stream.write
+    if isinstance(stream, (io.BufferedIOBase, io.RawIOBase)) or 'b' in getattr(stream, 'mode', ''):
+        return lambda text: stream.write(text.encode('utf-8'))
+    return stream.write
+
+
+def number_formatter(decimals: Optional[int] = None) -> Callable[[float], str]:
+    """ return the function used to format coordinates and lengths
+    :argument decimals number of decimal places to round to (None keeps the full precision,
+                       0 snaps to integer pixels, negative values snap to multiples of 10, 100, ...)
+    """
+    if decimals is None:
+        return str
+    if decimals == 0:
+        return lambda value: str(round(value))
+    if decimals < 0:
+        return lambda value: str(int(round(value, decimals)))
+    spec = f'.{decimals}f'
+
+    def format_number(value: float) -> str:
+        text = format(value, spec).rstrip('0').rstrip('.')
+        return '0' if text == '-0' else text
+    return format_number
+
+
+@lru_cache(maxsize=4096)
+def class_string(classes: tuple[str, ...]) -> str:
+    """ the (interned) value of a class attribute
+    Elements with the same classes share a single string instance.
+    """
+    return sys.intern(' '.join(classes))
+
+
+def open_svg_file(file_path: Path, compress: Optional[bool] = None, compresslevel: int = 9) -> TextIO:
+    """ open a file for writing an SVG into it
+    Compressed files are gzipped incrementally while they are written.
+    :argument compress write a gzip compressed file (default: only for the suffix .svgz)
+    :argument compresslevel gzip compression level from 1 (fastest) to 9 (smallest)
+    """
+    if compress is None:
+        compress = Path(file_path).suffix.lower() == '.svgz'
+    if compress:
+        return gzip.open(file_path, 'wt', encoding='utf-8', compresslevel=compresslevel)
+    return open(file_path, 'w', encoding='utf-8')
 
 
 class SvgElement:
     """ general class for describing an element in an SVG and transforming it into
     its XML representation for saving it """
+    __slots__ = ('_tag', '_attributes', '_class', '_content')
+
     def __init__(self, tag: str,
                  attributes: Optional[dict[str, str]] = None,
                  content: Optional[str] = None,
                  classes: Optional[list[str]] = None,
                  ):
         self._tag = tag
-        self._attributes = attributes or {}
+        self._class: Optional[str] = None
+        if attributes and 'class' in attributes:
+            attributes = dict(attributes)
+            self._class = class_string((attributes.pop('class'),))
+        self._attributes = attributes or None
         self._content = content
         self._add_classes(classes)
 
@@ -36,24 +104,48 @@ class SvgElement:
         """ add new classes to the element's attributes """
         if classes is None or len(classes) == 0:
             return
-        if 'class' not in self._attributes:
-            self._attributes['class'] = ' '.join(classes)
+        if self._class is None:
+            self._class = class_string(tuple(classes))
             return
+        class_attribute = self._class
         for class_name in classes:
-            if class_name in self._attributes['class']:
+            if class_name in class_attribute:
                 continue
-            self._attributes['class'] += ' ' + class_name
+            class_attribute += ' ' + class_name
+        self._class = class_string((class_attribute,))
+
+    def _typed_attributes(self, format_number: Callable[[float], str]) -> Iterable[tuple[str, str]]:
+        """ attributes that are derived from the typed fields of a subclass
+        (formatted only when they are requested)
+        """
+        return ()
+
+    def attribute_items(self, format_number: Callable[[float], str] = str) -> Iterator[tuple[str, str]]:
+        """ the element's attributes as (name, value) pairs
+        :argument format_number function used to format all coordinates and lengths
+        """
+        if self._class is not None:
+            yield 'class', self._class
+        if self._attributes is not None:
+            yield from self._attributes.items()
+        yield from self._typed_attributes(format_number)
 
     @property
     def attributes(self) -> dict[str, str]:
-        """ dictionary of the element's attributes """
-        return self._attributes
+        """ dictionary of the element's attributes
+        (a new dictionary, changing it does not change the element)
+        """
+        return dict(self.attribute_items())
+
+    def walk(self) -> Iterator['SvgElement']:
+        """ iterate over this element and all elements contained in it """
+        yield self
 
     @property
     def classes(self) -> list[str]:
         """ list of the element's classes """
-        if 'class' in self._attributes:
-            return self._attributes['class'].split(' ')
+        if self._class is not None:
+            return self._class.split(' ')
         return []
 
     @property
@@ -62,33 +154,172 @@ class SvgElement:
         return self._content
 
     def __str__(self) -> str:
-        svg_element = f'<{self.tag}'
-        for key, value in self.attributes.items():
-            svg_element += f' {key}="{escape(value)}"'
-        if self.content is not None:
-            svg_element += f'>{self.content}</{self.tag}>'
+        parts = []
+        SvgWriter(parts.append).write_element(self)
+        return ''.join(parts)
+
+
+class SvgWriter:
+    """ single-pass serializer for a tree of SVG elements
+    The tree is walked only once and the nesting depth is tracked while doing so,
+    so every element is formatted exactly once, independent of its depth.
+    """
+    def __init__(self, write: Callable[[str], object], indent: str = _INDENT, line_break: str = '\n',
+                 minify: bool = False, decimals: Optional[int] = None,
+                 image_symbols: Optional[dict[str, str]] = None):
+        """
+        :param write: function that receives the serialized pieces
+        :param indent: indentation added for each level of nesting
+        :param line_break: separator between the serialized elements
+        :param minify: leave out all insignificant whitespace (overrides indent and line_break)
+        :param decimals: precision of all coordinates and lengths (see number_formatter)
+        :param image_symbols: ids of defined ImageSymbols by their image data;
+                              images with this data are written as references to the symbol
+        """
+        self._write = write
+        self._image_symbols = image_symbols or {}
+        self._format_number = number_formatter(decimals)
+        self._indent = '' if minify else indent
+        self._line_break = '' if minify else line_break
+        self._empty_tag_end = '/>' if minify else ' />'
+        self._prefixes = ['']
+
+    def _prefix(self, depth: int) -> str:
+        """ the (cached) indentation prefix of the given nesting depth """
+        while len(self._prefixes) <= depth:
+            self._prefixes.append(self._prefixes[-1] + self._indent)
+        return self._prefixes[depth]
+
+    def write_element(self, element: SvgElement, depth: int = 0) -> None:
+        """ serialize an element and all of its children
+        (without a line break after the element)
+        """
+        if isinstance(element, SvgGroup):
+            self.write_container(element.tag, element.attribute_items(), element.elements, depth)
+            return
+        if self._image_symbols and isinstance(element, Image) and element.xlink_href in self._image_symbols:
+            element = element.reference(self._image_symbols[element.xlink_href])
+        start_tag = self._start_tag(element.tag, element.attribute_items(self._format_number), depth)
+        if element.content is not None:
+            self._write(f'{start_tag}>{element.content}</{element.tag}>')
+        else:
+            self._write(start_tag + self._empty_tag_end)
+
+    def write_container(self, tag: str, attributes: Iterable[tuple[str, str]],
+                        elements: Iterable[SvgElement], depth: int = 0) -> None:
+        """ serialize an element that contains other elements
+        (the contained elements are consumed one after another, so they may be generated lazily)
+        """
+        write = self._write
+        start_tag = self._start_tag(tag, attributes, depth)
+        opened = False
+        for element in elements:
+            if not opened:
+                write(start_tag + '>')
+                opened = True
+            write(self._line_break)
+            self.write_element(element, depth + 1)
+        if opened:
+            write(f'{self._line_break}{self._prefix(depth)}</{tag}>')
         else:
-            svg_element += ' />'
-        return svg_element
+            write(start_tag + self._empty_tag_end)
+
+    def write_line(self, element: SvgElement, depth: int = 0) -> None:
+        """ serialize an element followed by a line break """
+        self.write_element(element, depth)
+        self._write(self._line_break)
+
+    def write_line_break(self) -> None:
+        """ write a single line break """
+        self._write(self._line_break)
+
+    def _start_tag(self, tag: str, attributes: Iterable[tuple[str, str]], depth: int) -> str:
+        """ the indented start tag up to (excluding) its closing bracket """
+        return self._prefix(depth) + '<' + tag + ''.join(
+            [f' {key}="{escape(value)}"' for key, value in attributes]
+        )
+
+
+def _selector_can_match(selector: str, used: set[tuple[str, frozenset[str]]]) -> bool:
+    """ check if a CSS selector can match any of the used (tag, classes) combinations """
+    for part in selector.split(','):
+        match = _SIMPLE_SELECTOR.fullmatch(part.strip())
+        if match is None:
+            return True
+        tag, classes = match.group(1), set(match.group(2).split('.')[1:])
+        for used_tag, used_classes in used:
+            if tag in (None, '*', used_tag) and classes <= used_classes:
+                return True
+    return False
 
 
 class CascadeStyleSheet(dict):
-    """ basic representation of a CSS """
+    """ basic representation of a CSS
+    Compiled style sheets are cached until the entries are changed.
+    For this, entries need to be replaced (e.g. `css['path'] = {...}`) instead of changed in place.
+    """
+    # compilations shared by all style sheets that still contain exactly the defaults
+    _default_compilations: dict[tuple[str, str, bool], str] = {}
+    # the entries of such a style sheet, to notice when one of its rules was changed in place
+    _default_entries: dict[str, dict[str, str]] = {}
+
     def __init__(self, custom_entries: Optional[dict] = None):
-        super().__init__(DEFAULT_CSS)
-        if custom_entries is not None:
-            self.update(custom_entries)
-        self.full_validate()
+        super().__init__({selector: dict(props) for selector, props in DEFAULT_CSS.items()})
+        self._compilations: dict[tuple[str, str, bool], str] = {}
+        self._is_default = True
         self._used_color_palette: Optional[ColorPalette] = None
+        if custom_entries:
+            self.update(custom_entries)
 
     def full_validate(self):
         """ check that the object represents valid CSS """
-        for key, value in self.items():
-            self.__validate_one_entry(key, value)
+        self._validate_entries(self)
+
+    def _changed(self) -> None:
+        """ drop the cached compilations after the entries were changed """
+        self._compilations.clear()
+        self._is_default = False
 
     def __setitem__(self, key, value):
         self.__validate_one_entry(key, value)
         super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs) -> None:
+        entries = dict(*args, **kwargs)
+        self._validate_entries(entries)
+        super().update(entries)
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, *args):
+        self._changed()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._changed()
+        return super().popitem()
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    @classmethod
+    def _validate_entries(cls, entries: dict) -> None:
+        for key, value in entries.items():
+            cls.__validate_one_entry(key, value)
 
     @staticmethod
     def __validate_one_entry(key, value):
@@ -102,23 +333,58 @@ class CascadeStyleSheet(dict):
             if not isinstance(sub_value, str):
                 raise TypeError(f"Invalid value for {sub_key} in entry {key}. All CSS values must be strings.")
 
-    def compile(self, indent='', line_break='\n') -> str:
-        """ compile the contained style definition into a css file """
+    def compile(self, indent='', line_break='\n', minify: bool = False) -> str:
+        """ compile the contained style definition into a css file
+        :argument minify leave out all insignificant whitespace (overrides indent and line_break)
+        """
         if self._used_color_palette is None:
             self.set_color_palette(DEFAULT_COLORS)
-        css_section = f'{line_break or " "}'
-        for selector, props in self.items():
-            css_section += f'{selector} {{{line_break}'
-            css_section += f'{line_break or " "}'.join(
-                f'{indent}{name}: {value};' for name, value in props.items()
-            )
-            css_section += f'{line_break or " "}}}{line_break or " "}'
+        key = (indent, line_break, minify)
+        if self._is_default and self != self._default_entries:
+            self._changed()
+        compilations = self._default_compilations if self._is_default else self._compilations
+        css_section = compilations.get(key)
+        if css_section is None:
+            css_section = self._compile(indent, line_break, minify)
+            compilations[key] = css_section
         return css_section
 
+    def _compile(self, indent: str, line_break: str, minify: bool) -> str:
+        if minify:
+            return ''.join(
+                f'{_SELECTOR_SEPARATOR.sub(",", selector.strip())}{{'
+                + ';'.join(f'{name}:{value}' for name, value in props.items())
+                + '}'
+                for selector, props in self.items()
+            )
+        separator = line_break or ' '
+        parts = [separator]
+        for selector, props in self.items():
+            parts.append(f'{selector} {{{line_break}')
+            parts.append(separator.join(f'{indent}{name}: {value};' for name, value in props.items()))
+            parts.append(f'{separator}}}{separator}')
+        return ''.join(parts)
+
+    def pruned(self, used_elements: Iterable[tuple[str, Iterable[str]]]) -> 'CascadeStyleSheet':
+        """ a copy without the rules whose selectors can not match any of the given elements
+        Only selectors made up of a tag and/or classes are checked, all others are kept.
+        :argument used_elements tag and classes of every element in the document
+        """
+        if self._used_color_palette is None:
+            self.set_color_palette(DEFAULT_COLORS)
+        used = {(tag, frozenset(classes)) for tag, classes in used_elements}
+        pruned = CascadeStyleSheet()
+        pruned.clear()
+        pruned.update({selector: props for selector, props in self.items()
+                       if _selector_can_match(selector, used)})
+        pruned._used_color_palette = self._used_color_palette
+        return pruned
+
     def set_color_palette(self, palette: ColorPalette) -> None:
         """ add CSS entries for all colors in the given palette """
         if self._used_color_palette is not None:
             raise RuntimeError("Color palette was already set on this CascadeStyleSheet")
+        is_default = self._is_default
         for i, color in enumerate(palette):
             self[f'.colored.c{i:02}'] = {
                 'stroke': color.color,
@@ -128,6 +394,15 @@ class CascadeStyleSheet(dict):
                 'fill': color.top_text_color,
             }
         self._used_color_palette = palette
+        self._is_default = is_default and palette is DEFAULT_COLORS
+
+
+# the default entries are validated once, instead of for every new style sheet
+CascadeStyleSheet._validate_entries(DEFAULT_CSS)
+_default_sheet = CascadeStyleSheet()
+_default_sheet.set_color_palette(DEFAULT_COLORS)
+CascadeStyleSheet._default_entries = {selector: dict(props) for selector, props in _default_sheet.items()}
+del _default_sheet
 
 
 class SvgFile:
@@ -137,18 +412,33 @@ class SvgFile:
     def __init__(self, width: int, height: int,
                  css: Optional[CascadeStyleSheet] = None,
                  elements: Optional[list[SvgElement]] = None,
-                 definitions: Optional[list[SvgElement]] = None):
+                 definitions: Optional[list[SvgElement]] = None,
+                 minify: bool = False,
+                 decimals: Optional[int] = None,
+                 prune_css: bool = False):
+        """
+        :param minify: leave out all insignificant whitespace and the optional XML declaration
+        :param decimals: precision of all coordinates and lengths (see number_formatter)
+        :param prune_css: leave out all CSS rules that can not match any of the written elements
+                          (lazily generated elements are generated before writing in this case)
+        """
         self.width = width
         self.height = height
         self.css = css or CascadeStyleSheet()
         self.elements = elements or []
         self.defs = definitions or []
+        self.minify = minify
+        self.decimals = decimals
+        self.prune_css = prune_css
 
     @property
     def header(self) -> str:
         """ first lines of the .svg file """
         width, height = int(self.width), int(self.height)
         view_x, view_y = 0, 0
+        if self.minify:
+            return ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"'
+                    f' width="{width}" height="{height}" viewBox="{view_x} {view_y} {width} {height}">')
         lines = [
             '<?xml version="1.0" encoding="UTF-8"?>',
             '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"',
@@ -159,113 +449,256 @@ class SvgFile:
     @property
     def style_section(self) -> str:
         """ style section lines of the .svg file """
+        return self._style_section(self.elements)
+
+    def _style_section(self, elements: Iterable[SvgElement]) -> str:
+        """ the style section for the given elements (only iterated when pruning the CSS) """
+        css = self.css
+        if self.prune_css:
+            used_elements = [('svg', [])]
+            used_elements += ((element.tag, element.classes)
+                              for root in [*self.defs, *elements] for element in root.walk())
+            css = css.pruned(used_elements)
+        if self.minify:
+            return f'<style>{css.compile(minify=True)}</style>'
         style_section = '<style>'
-        style_section += self.css.compile(indent='  ', line_break='\n')
+        style_section += css.compile(indent='  ', line_break='\n')
         style_section += '</style>\n'
         return style_section
 
     @property
     def defs_section(self) -> str:
         """ definition section lines of the .svg file """
-        defs_section = ''
-        if len(self.defs) > 0:
-            defs_section += '<defs>\n'
-            defs_section += ''.join(_INDENT + str(element) + '\n'
-                                    for element in self.defs)
-            defs_section += '</defs>\n'
-        return defs_section
+        parts = []
+        self._write_defs(self._writer(parts.append))
+        return ''.join(parts)
 
     @property
     def element_section(self) -> str:
         """ main elements section lines of the .svg file """
-        element_section = ''.join(str(element) + '\n'
-                                  for element in self.elements)
-        return element_section
+        parts = []
+        self._write_elements(self._writer(parts.append), self.elements)
+        return ''.join(parts)
 
     @property
     def footer(self) -> str:
         """ last lines of the .svg file """
+        if self.minify:
+            return '</svg>'
         return '</svg>\n'
 
     @property
     def full(self) -> str:
         """ the full raw .svg file """
-        full = self.header
-        full += self.style_section
-        full += self.defs_section
-        full += self.element_section
-        full += self.footer
-        return full
+        buffer = io.StringIO()
+        self.write_to(buffer)
+        return buffer.getvalue()
+
+    def write_to(self, stream, elements: Optional[Iterable[SvgElement]] = None) -> None:
+        """ write the .svg file into a text or binary stream
+        The elements are serialized one after another,
+        so the full document is never held in memory as a single string.
+        :argument elements elements to write instead of the stored ones (may be generated lazily)
+        """
+        elements = self.elements if elements is None else elements
+        if self.prune_css:
+            elements = list(elements)
+        write = stream_writer(stream)
+        writer = self._writer(write)
+        write(self.header)
+        write(self._style_section(elements))
+        self._write_defs(writer)
+        self._write_elements(writer, elements)
+        write(self.footer)
+
+    def _writer(self, write: Callable[[str], object]) -> SvgWriter:
+        image_symbols = {definition.xlink_href: definition.id
+                         for definition in self.defs if isinstance(definition, ImageSymbol)}
+        return SvgWriter(write, minify=self.minify, decimals=self.decimals, image_symbols=image_symbols)
+
+    def _write_defs(self, writer: SvgWriter) -> None:
+        if len(self.defs) > 0:
+            writer.write_container('defs', (), self.defs)
+            writer.write_line_break()
+
+    @staticmethod
+    def _write_elements(writer: SvgWriter, elements: Iterable[SvgElement]) -> None:
+        for element in elements:
+            writer.write_line(element)
 
-    def save_as(self, file_path: Path) -> None:
-        """ save the SVG under given file path """
-        with open(file_path, 'w', encoding='utf-8') as out_file:
-            out_file.write(self.full)
+    def save_as(self, file_path: Path, compress: Optional[bool] = None, compresslevel: int = 9) -> None:
+        """ save the SVG under given file path
+        :argument compress write a gzip compressed file (default: only for the suffix .svgz)
+        :argument compresslevel gzip compression level from 1 (fastest) to 9 (smallest)
+        """
+        with open_svg_file(file_path, compress=compress, compresslevel=compresslevel) as out_file:
+            self.write_to(out_file)
 
 
 class Line(SvgElement):
     """ straight line from one point to another """
+    __slots__ = ('source', 'target')
+
     def __init__(self, source: Vector, target: Vector, classes: Optional[list[str]] = None):
         super().__init__(tag='path', classes=classes)
         self.source = source
         self.target = target
-        self._update_attributes()
 
-    def _update_attributes(self) -> None:
-        self._attributes.update({
-            'd': f'M{self.source.x},{self.source.y} L{self.target.x},{self.target.y}'
-        })
+    def _typed_attributes(self, format_number: Callable[[float], str]) -> Iterable[tuple[str, str]]:
+        source, target = self.source, self.target
+        return (
+            ('d', f'M{format_number(source.x)},{format_number(source.y)}'
+                  f' L{format_number(target.x)},{format_number(target.y)}'),
+        )
+
+
+class Polyline(SvgElement):
+    """ connected straight lines through a series of points, written as a single path """
+    __slots__ = ('xs', 'ys')
+
+    def __init__(self, xs: Sequence[float], ys: Sequence[float], classes: Optional[list[str]] = None):
+        super().__init__(tag='path', classes=classes)
+        if len(xs) != len(ys):
+            raise ValueError("xs and ys need to be of the same length")
+        if len(xs) == 0:
+            raise ValueError("a polyline needs at least one point")
+        self.xs = xs
+        self.ys = ys
+
+    def _typed_attributes(self, format_number: Callable[[float], str]) -> Iterable[tuple[str, str]]:
+        # coordinate pairs following the first one are implicit line-to commands
+        points = ' '.join([f'{format_number(x)},{format_number(y)}' for x, y in zip(self.xs, self.ys)])
+        return (
+            ('d', f'M{points}'),
+        )
 
 
 class Text(SvgElement):
     """ text at a fixed position on the canvas """
+    __slots__ = ('coord',)
+
     def __init__(self, coord: Vector, text: str, classes: Optional[list[str]] = None):
         super().__init__(tag='text', content=escape(text), classes=classes)
         self.coord = coord
-        self._update_attributes()
 
-    def _update_attributes(self) -> None:
-        self._attributes.update({
-            'x': str(self.coord.x),
-            'y': str(self.coord.y),
-        })
+    def _typed_attributes(self, format_number: Callable[[float], str]) -> Iterable[tuple[str, str]]:
+        return (
+            ('x', format_number(self.coord.x)),
+            ('y', format_number(self.coord.y)),
+        )
 
 
 class Rectangle(SvgElement):
     """ rectangle filled with the given color """
+    __slots__ = ('corner1', 'corner2')
+
     def __init__(self, corner1: Vector, corner2: Vector, classes: Optional[list[str]] = None):
         super().__init__(tag='rect', classes=classes)
         self.corner1 = corner1
         self.corner2 = corner2
-        self._update_attributes()
 
-    def _update_attributes(self) -> None:
-        self._attributes.update({
-            'x': str(min(self.corner1.x, self.corner2.x)),
-            'y': str(min(self.corner1.y, self.corner2.y)),
-            'width': str(math.fabs(self.corner1.x - self.corner2.x)),
-            'height': str(math.fabs(self.corner1.y - self.corner2.y)),
-        })
+    def _typed_attributes(self, format_number: Callable[[float], str]) -> Iterable[tuple[str, str]]:
+        corner1, corner2 = self.corner1, self.corner2
+        return (
+            ('x', format_number(min(corner1.x, corner2.x))),
+            ('y', format_number(min(corner1.y, corner2.y))),
+            ('width', format_number(math.fabs(corner1.x - corner2.x))),
+            ('height', format_number(math.fabs(corner1.y - corner2.y))),
+        )
 
 
 class Circle(SvgElement):
     """ circle filled with the given color """
+    __slots__ = ('center', 'radius')
+
     def __init__(self, center: Vector, radius: float, classes: Optional[list[str]] = None):
         super().__init__(tag='circle', classes=classes)
         self.center = center
         self.radius = radius
-        self._update_attributes()
 
-    def _update_attributes(self) -> None:
-        self._attributes.update({
-            'cx': str(self.center.x),
-            'cy': str(self.center.y),
-            'r': str(self.radius),
-        })
+    def _typed_attributes(self, format_number: Callable[[float], str]) -> Iterable[tuple[str, str]]:
+        return (
+            ('cx', format_number(self.center.x)),
+            ('cy', format_number(self.center.y)),
+            ('r', format_number(self.radius)),
+        )
+
+
+def _read_image_data(file: Path) -> str:
+    """ read an image file and encode it as a data URL """
+    mimetype, _ = guess_type(file)
+    with open(file, 'rb') as image_file:
+        image_data = b64encode(image_file.read())
+    return f'data:{mimetype};base64,{image_data.decode()}'
+
+
+class ImageDataCache:
+    """ process-wide LRU cache for the data representation of image files
+    Entries are validated against the modification time and size of the file,
+    so changed files are read again. The least recently used entries are evicted
+    once the cached data exceeds the byte budget.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        :param max_bytes: upper limit for the summed size of all cached data
+        """
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Path, tuple[int, int, str]] = OrderedDict()
+        self._n_bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def n_bytes(self) -> int:
+        """ summed size of all cached data """
+        return self._n_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, file: Path) -> str:
+        """ the data representation of the image file, read from disk only if necessary """
+        path = Path(file).resolve()
+        stat = path.stat()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        image_data = _read_image_data(path)
+        with self._lock:
+            self._remove(path)
+            if len(image_data) <= self.max_bytes:
+                self._entries[path] = (stat.st_mtime_ns, stat.st_size, image_data)
+                self._n_bytes += len(image_data)
+            while self._n_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return image_data
+
+    def clear(self) -> None:
+        """ remove all entries and reset the hit and miss counters """
+        with self._lock:
+            self._entries.clear()
+            self._n_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _remove(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._n_bytes -= len(entry[2])
+
+
+IMAGE_DATA_CACHE = ImageDataCache()
 
 
 class Image(SvgElement):
     """ SVG embedding of the image found at the given file path """
+    __slots__ = ('top_left', 'width', 'height', 'xlink_href')
+
     def __init__(self, top_left: Vector, width: float, height: float,
                  xlink_href: str, classes: Optional[list[str]] = None):
         super().__init__(tag='image', classes=classes)
@@ -273,25 +706,26 @@ class Image(SvgElement):
         self.width = width
         self.height = height
         self.xlink_href = xlink_href
-        self._update_attributes()
 
-    def _update_attributes(self) -> None:
-        self._attributes.update({
-            'x': str(self.top_left.x),
-            'y': str(self.top_left.y),
-            'width': str(self.width),
-            'height': str(self.height),
-            'xlink:href': self.xlink_href,
-        })
+    def _typed_attributes(self, format_number: Callable[[float], str]) -> Iterable[tuple[str, str]]:
+        return (
+            ('x', format_number(self.top_left.x)),
+            ('y', format_number(self.top_left.y)),
+            ('width', format_number(self.width)),
+            ('height', format_number(self.height)),
+            ('xlink:href', self.xlink_href),
+        )
+
+    def reference(self, symbol_id: str) -> 'ImageReference':
+        """ an element that shows the same image by referencing a symbol that contains it """
+        return ImageReference(self.top_left, self.width, self.height, symbol_id, classes=self.classes)
 
     @staticmethod
     def xlink_href_from_file_path(file: Path) -> str:
-        """ determine the data representation of the image from its path """
-        mimetype, encoding = guess_type(file)
-        with open(file, 'rb', encoding=encoding) as image_file:
-            image_data = b64encode(image_file.read())
-        xlink_href = f'data:{mimetype};base64,{image_data.decode()}'
-        return xlink_href
+        """ determine the data representation of the image from its path
+        (repeated calls for an unchanged file are answered from IMAGE_DATA_CACHE)
+        """
+        return IMAGE_DATA_CACHE.get(file)
 
     @classmethod
     def from_path(cls, top_left: Vector, width: float, height: float,
@@ -301,34 +735,129 @@ class Image(SvgElement):
         return cls(top_left, width, height, xlink_href, classes)
 
 
+class ImageReference(SvgElement):
+    """ an image that is defined once as an ImageSymbol and referenced via <use> """
+    __slots__ = ('top_left', 'width', 'height', 'symbol_id')
+
+    def __init__(self, top_left: Vector, width: float, height: float,
+                 symbol_id: str, classes: Optional[list[str]] = None):
+        super().__init__(tag='use', classes=classes)
+        self.top_left = top_left
+        self.width = width
+        self.height = height
+        self.symbol_id = symbol_id
+
+    def _typed_attributes(self, format_number: Callable[[float], str]) -> Iterable[tuple[str, str]]:
+        return (
+            ('x', format_number(self.top_left.x)),
+            ('y', format_number(self.top_left.y)),
+            ('width', format_number(self.width)),
+            ('height', format_number(self.height)),
+            ('xlink:href', f'#{self.symbol_id}'),
+        )
+
+
+_ID_COUNTERS: ContextVar[dict[str, int]] = ContextVar('svg_id_counters')
+
+
+@contextmanager
+def id_scope() -> Iterator[dict[str, int]]:
+    """ allocate the IDs of all groups created inside this context from fresh counters
+    The counters are local to the current thread (or asyncio task), so renders inside
+    such a scope are deterministic and can run concurrently.
+    Outside of any scope, the shared counters in SvgGroup.id_counters are used.
+    """
+    id_counters = {}
+    token = _ID_COUNTERS.set(id_counters)
+    try:
+        yield id_counters
+    finally:
+        _ID_COUNTERS.reset(token)
+
+
+def active_id_counters() -> dict[str, int]:
+    """ the group ID counters that are used for groups created at this point """
+    id_counters = _ID_COUNTERS.get(None)  # not set outside of any scope
+    return SvgGroup.id_counters if id_counters is None else id_counters
+
+
 class SvgGroup(SvgElement):
-    """ a group of SVG elements inside a g-container """
+    """ a group of SVG elements inside a g-container
+    The contained elements can also be given as a lazy iterable (e.g. a generator),
+    which is consumed while the group is serialized. Such a group can only be serialized once.
+    """
+    __slots__ = ('_elements', '_id')
     id_counters = {}
 
     def __init__(self,
-                 elements: Optional[list[SvgElement]] = None,
+                 elements: Optional[Iterable[SvgElement]] = None,
                  attributes: Optional[dict[str, str]] = None,
                  classes: Optional[list[str]] = None,
                  id_base: str = 'group',
                  exact_id: Optional[str] = None,
                  ):
         super().__init__(tag='g', attributes=attributes, classes=classes)
-        self._elements = elements or []
-        counter = SvgGroup.id_counters.setdefault(id_base, 1)
+        self._elements: list[SvgElement] | Iterable[SvgElement] = elements or []
+        id_counters = active_id_counters()
+        counter = id_counters.setdefault(id_base, 1)
         if exact_id is not None:
-            self._attributes['id'] = exact_id
+            self._id = exact_id
         else:
-            self._attributes['id'] = f'{id_base}_{counter:03}'
-        SvgGroup.id_counters[id_base] += 1
+            self._id = f'{id_base}_{counter:03}'
+        id_counters[id_base] += 1
+
+    def _typed_attributes(self, format_number: Callable[[float], str]) -> Iterable[tuple[str, str]]:
+        return (('id', self._id),)
+
+    @property
+    def elements(self) -> Iterable[SvgElement]:
+        """ the contained elements """
+        return self._elements
 
     @property
     def content(self) -> Optional[str]:
         """ the contained elements """
+        if not isinstance(self._elements, list):
+            raise TypeError("The content of a lazily generated group can only be accessed by serializing it")
         if len(self._elements) == 0:
             return None
-        content_lines = [indent(str(element), _INDENT) for element in self._elements]
-        return '\n' + '\n'.join(content_lines) + '\n'
+        parts = []
+        writer = SvgWriter(parts.append)
+        writer.write_line_break()
+        for element in self._elements:
+            writer.write_line(element, depth=1)
+        return ''.join(parts)
+
+    def walk(self) -> Iterator[SvgElement]:
+        yield self
+        for element in self._materialized():
+            yield from element.walk()
+
+    def _materialized(self) -> list[SvgElement]:
+        """ the contained elements as a list, which consumes a lazy iterable """
+        if not isinstance(self._elements, list):
+            self._elements = list(self._elements)
+        return cast(list[SvgElement], self._elements)
 
     def append(self, element: SvgElement) -> None:
         """ add an element to this group """
-        self._elements.append(element)
+        elements = self._materialized()
+        elements.append(element)
+
+
+class ImageSymbol(SvgGroup):
+    """ definition of image data that can be shown multiple times via ImageReference
+    The contained image fills the viewport given by each reference.
+    """
+    __slots__ = ('xlink_href',)
+
+    def __init__(self, xlink_href: str, symbol_id: str):
+        image = SvgElement('image', attributes={'width': '100%', 'height': '100%', 'xlink:href': xlink_href})
+        super().__init__([image], exact_id=symbol_id)
+        self._tag = 'symbol'
+        self.xlink_href = xlink_href
+
+    @property
+    def id(self) -> str:
+        """ the id that is used to reference the symbol """
+        return self._id
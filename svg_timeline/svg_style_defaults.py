@@ -20,8 +20,10 @@ class ClassNames(StrEnum):
     TITLE = 'title'
     TIME_ARROW = 'time_arrow'
     EVENT = 'event'
+    EVENT_CLUSTER = 'event_cluster'
     TIMESPAN = 'timespan'
     CONNECTED_EVENTS = 'connected_events'
+    EVENT_DENSITY = 'event_density'
     IMAGE = 'image'
     # sub-elements
     TIME_ARROW_AXIS = 'time_axis'
@@ -1,14 +1,17 @@
 """ classes to create evenly spaced datetime objects within a range """
 import calendar
-from calendar import weekday
-from collections.abc import Iterable
-from datetime import datetime
+import math
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from typing import Optional
 
 from svg_timeline.notation import dt
 
 
 class TimeSpacing:
-    """ base class for semantic datetime spacing within a given range """
+    """ base class for semantic datetime spacing within a given range
+    The tics are generated on first access and cached afterward.
+    """
     def __init__(
             self,
             start_date: datetime | str,
@@ -18,6 +21,26 @@ class TimeSpacing:
         self._end_date = end_date if isinstance(end_date, datetime) else dt(end_date)
         if not self._start_date < self._end_date:
             raise ValueError("start date needs to be smaller than end date")
+        self._dates: Optional[list[datetime]] = None
+        self._labels: Optional[list[str]] = None
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._start_date!r}, {self._end_date!r})'
+
+    def __len__(self) -> int:
+        """ the number of tics """
+        return len(self.dates)
+
+    def clipped(self, start_date: datetime, end_date: datetime) -> 'TimeSpacing':
+        """ the same kind of spacing for another time range """
+        return type(self)(start_date, end_date)
+
+    def __getitem__(self, index: int) -> datetime:
+        """ the position of a single tic """
+        return self.dates[index]
+
+    def __iter__(self) -> Iterator[datetime]:
+        return iter(self.dates)
 
     @property
     def start_date(self) -> datetime:
@@ -34,13 +57,83 @@ class TimeSpacing:
         """ Tic labels
         :return list of tic labels as strings
         """
-        raise NotImplementedError
+        if self._labels is None:
+            self._labels = [self.label(date) for date in self.dates]
+        return self._labels
 
     @property
     def dates(self) -> list[datetime]:
         """ Positions of the tics
         :return list of tic positions as datetime objects
         """
+        if self._dates is None:
+            self._dates = self._generate_dates()
+        return self._dates
+
+    def label(self, date: datetime) -> str:
+        """ the label of the tic at the given position """
+        raise NotImplementedError
+
+    def _generate_dates(self) -> list[datetime]:
+        raise NotImplementedError
+
+
+class IndexedTimeSpacing(TimeSpacing):
+    """ base class for spacings whose number of tics and single tics
+    can be calculated directly, without generating the other tics
+    To protect against accidentally huge spacings, generating more than max_tics dates raises a ValueError.
+    """
+    def __init__(
+            self,
+            start_date: datetime | str,
+            end_date: datetime | str,
+            max_tics: int = 100_000,
+    ):
+        """
+        :param max_tics: maximal number of tics that are generated
+        """
+        super().__init__(start_date=start_date, end_date=end_date)
+        self._max_tics = max_tics
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._start_date!r}, {self._end_date!r}, max_tics={self._max_tics!r})'
+
+    def clipped(self, start_date: datetime, end_date: datetime) -> 'IndexedTimeSpacing':
+        return type(self)(start_date, end_date, max_tics=self._max_tics)
+
+    @property
+    def max_tics(self) -> int:
+        """ the maximal number of tics that are generated """
+        return self._max_tics
+
+    def __len__(self) -> int:
+        return max(self._count(), 0)
+
+    def __getitem__(self, index: int) -> datetime:
+        n_tics = len(self)
+        if index < 0:
+            index += n_tics
+        if not 0 <= index < n_tics:
+            raise IndexError("tic index out of range")
+        return self._date_at(index)
+
+    def __iter__(self) -> Iterator[datetime]:
+        if self._dates is not None:
+            return iter(self._dates)
+        return map(self._date_at, range(len(self)))
+
+    def _generate_dates(self) -> list[datetime]:
+        n_tics = len(self)
+        if n_tics > self.max_tics:
+            raise ValueError(f"{type(self).__name__} would generate {n_tics} tics (max_tics = {self.max_tics})")
+        return list(map(self._date_at, range(n_tics)))
+
+    def _count(self) -> int:
+        """ closed form for the number of tics (may be negative for an empty range) """
+        raise NotImplementedError
+
+    def _date_at(self, index: int) -> datetime:
+        """ closed form for the position of the tic with a (non-negative) index """
         raise NotImplementedError
 
 
@@ -90,26 +183,21 @@ def _normalize_time(hour: int = 0, minute: int = 0, second: int = 0) -> tuple[in
     return day_overflow, hour, minute, second
 
 
-class YearBasedTimeSpacing(TimeSpacing):
+class YearBasedTimeSpacing(IndexedTimeSpacing):
     """ base class to return one entry per X years """
     _base = 1
 
-    @property
-    def _range(self) -> Iterable:
-        first = (self._start_date.year // self._base + 1) * self._base
-        last = (self._end_date.year // self._base) * self._base
-        return range(first, last + self._base, self._base)
+    def _count(self) -> int:
+        first = self._start_date.year // self._base + 1
+        last = self._end_date.year // self._base
+        return last - first + 1
 
-    @property
-    def dates(self) -> list[datetime]:
-        dates = [datetime(year=year, month=1, day=1)
-                 for year in self._range]
-        return dates
+    def _date_at(self, index: int) -> datetime:
+        first = (self._start_date.year // self._base + 1) * self._base
+        return datetime(year=first + index * self._base, month=1, day=1)
 
-    @property
-    def labels(self) -> list[str]:
-        labels = [str(value) for value in self._range]
-        return labels
+    def label(self, date: datetime) -> str:
+        return str(date.year)
 
 
 class TimeSpacingPerMillennia(YearBasedTimeSpacing):
@@ -134,144 +222,261 @@ class TimeSpacingPerYear(YearBasedTimeSpacing):
     _base = 1
 
 
-class TimeSpacingPerMonth(TimeSpacing):
+class TimeSpacingPerMonth(IndexedTimeSpacing):
     """ return one entry per month """
-    @property
-    def dates(self) -> list[datetime]:
-        year, month, _ = _normalize_month(year=self.start_date.year,
-                                          month=self.start_date.month + 1)
-        date = datetime(year=year, month=month, day=1)
-        dates = []
-        while date <= self.end_date:
-            dates.append(date)
-            year, month, _ = _normalize_month(year=year, month=month + 1)
-            date = datetime(year=year, month=month, day=1)
-        return dates
+    def _count(self) -> int:
+        first = self._start_date.year * 12 + self._start_date.month
+        last = self._end_date.year * 12 + self._end_date.month - 1
+        return last - first + 1
 
-    @property
-    def labels(self) -> list[str]:
-        labels = [calendar.month_abbr[date.month] for date in self.dates]
-        return labels
+    def _date_at(self, index: int) -> datetime:
+        # months are counted from January of the year 0
+        month = self._start_date.year * 12 + self._start_date.month + index
+        return datetime(year=month // 12, month=month % 12 + 1, day=1)
+
+    def label(self, date: datetime) -> str:
+        return calendar.month_abbr[date.month]
 
 
-class TimeSpacingPerWeek(TimeSpacing):
+class TimeSpacingPerWeek(IndexedTimeSpacing):
     """ return one entry per week """
-    @property
-    def dates(self) -> list[datetime]:
-        year, month, day = self.start_date.year, self.start_date.month, self.start_date.day
-        year, month, day = _normalize_date(year=year, month=month, day=day + 1)
-        while weekday(year, month, day) != 0:
-            year, month, day = _normalize_date(year=year, month=month, day=day + 1)
-        dates = []
-        date = datetime(year=year, month=month, day=day)
-        while date <= self.end_date:
-            dates.append(date)
-            year, month, day = _normalize_date(year=year, month=month, day=day + 7)
-            date = datetime(year=year, month=month, day=day)
-        return dates
+    def _first_monday(self) -> int:
+        """ the ordinal of the first Monday after the start date """
+        day_after = self._start_date.toordinal() + 1
+        return day_after + (7 - datetime.fromordinal(day_after).weekday()) % 7
 
-    @property
-    def labels(self) -> list[str]:
-        labels = [f"{date.isocalendar().week:02}" for date in self.dates]
-        return labels
+    def _count(self) -> int:
+        return (self._end_date.toordinal() - self._first_monday()) // 7 + 1
+
+    def _date_at(self, index: int) -> datetime:
+        return datetime.fromordinal(self._first_monday() + 7 * index)
 
+    def label(self, date: datetime) -> str:
+        return f"{date.isocalendar().week:02}"
+
+
+class FixedStepTimeSpacing(IndexedTimeSpacing):
+    """ base class to return one entry per fixed time step
+    The tics are aligned to multiples of the step, counted from the start of the day.
+    """
+    _step = timedelta(days=1)
 
-class TimeSpacingPerDay(TimeSpacing):
+    def __init__(
+            self,
+            start_date: datetime | str,
+            end_date: datetime | str,
+            max_tics: int = 100_000,
+    ):
+        super().__init__(start_date=start_date, end_date=end_date, max_tics=max_tics)
+        day_start = self._start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._first = day_start + ((self._start_date - day_start) // self._step + 1) * self._step
+
+    def _count(self) -> int:
+        return (self._end_date - self._first) // self._step + 1
+
+    def _date_at(self, index: int) -> datetime:
+        return self._first + index * self._step
+
+
+class TimeSpacingPerDay(FixedStepTimeSpacing):
     """ return one entry per day """
-    @property
-    def dates(self) -> list[datetime]:
-        date_tuple = _normalize_date(year=self.start_date.year,
-                                     month=self.start_date.month,
-                                     day=self.start_date.day + 1)
-        date = datetime(*date_tuple)
-        dates = []
-        while date <= self.end_date:
-            dates.append(date)
-            date_tuple = _normalize_date(year=date.year, month=date.month, day=date.day + 1)
-            date = datetime(*date_tuple)
-        return dates
+    _step = timedelta(days=1)
 
-    @property
-    def labels(self) -> list[str]:
-        labels = [str(date.day) for date in self.dates]
-        return labels
+    def label(self, date: datetime) -> str:
+        return str(date.day)
 
 
-class TimeSpacingPerHour(TimeSpacing):
+class TimeSpacingPerHour(FixedStepTimeSpacing):
     """ return one entry per hour """
-    @property
-    def dates(self) -> list[datetime]:
-        day_overflow, hour, _, _ = _normalize_time(hour=self.start_date.hour + 1)
-        date_tuple = _normalize_date(year=self.start_date.year,
-                                     month=self.start_date.month,
-                                     day=self.start_date.day + day_overflow)
-        date = datetime(*date_tuple, hour=hour)
-        dates = []
-        while date <= self.end_date:
-            dates.append(date)
-            day_overflow, hour, _, _ = _normalize_time(hour=date.hour + 1)
-            date_tuple = _normalize_date(year=date.year,
-                                         month=date.month,
-                                         day=date.day + day_overflow)
-            date = datetime(*date_tuple, hour=hour)
-        return dates
+    _step = timedelta(hours=1)
 
-    @property
-    def labels(self) -> list[str]:
-        labels = [f"{date.hour:02}:00" for date in self.dates]
-        return labels
+    def label(self, date: datetime) -> str:
+        return f"{date.hour:02}:00"
 
 
-class TimeSpacingPerMinute(TimeSpacing):
+class TimeSpacingPerMinute(FixedStepTimeSpacing):
     """ return one entry per minute """
-    @property
-    def dates(self) -> list[datetime]:
-        day_overflow, hour, minute, _ = _normalize_time(hour=self.start_date.hour,
-                                                        minute=self.start_date.minute + 1)
-        date_tuple = _normalize_date(year=self.start_date.year,
-                                     month=self.start_date.month,
-                                     day=self.start_date.day + day_overflow)
-        date = datetime(*date_tuple, hour=hour, minute=minute)
-        dates = []
-        while date <= self.end_date:
-            dates.append(date)
-            day_overflow, hour, minute, _ = _normalize_time(hour=date.hour, minute=date.minute + 1)
-            date_tuple = _normalize_date(year=date.year,
-                                         month=date.month,
-                                         day=date.day + day_overflow)
-            date = datetime(*date_tuple, hour=hour, minute=minute)
-        return dates
+    _step = timedelta(minutes=1)
 
-    @property
-    def labels(self) -> list[str]:
-        labels = [f"{date.hour:02}:{date.minute:02}" for date in self.dates]
-        return labels
+    def label(self, date: datetime) -> str:
+        return f"{date.hour:02}:{date.minute:02}"
 
 
-class TimeSpacingPerSecond(TimeSpacing):
+class TimeSpacingPerSecond(FixedStepTimeSpacing):
     """ return one entry per second """
+    _step = timedelta(seconds=1)
+
+    def label(self, date: datetime) -> str:
+        return f"{date.hour:02}:{date.minute:02}:{date.second:02}"
+
+
+_FIXED_UNITS = {
+    'week': timedelta(weeks=1),
+    'day': timedelta(days=1),
+    'hour': timedelta(hours=1),
+    'minute': timedelta(minutes=1),
+    'second': timedelta(seconds=1),
+    'millisecond': timedelta(milliseconds=1),
+    'microsecond': timedelta(microseconds=1),
+}
+_CALENDAR_UNITS = {
+    'year': 12,
+    'month': 1,
+}
+
+
+class TimeSpacingEvery(IndexedTimeSpacing):
+    """ return one entry every N units
+    Tics in months or years are placed on the first day of the month.
+    The labels are as precise as needed for the step size and alignment.
+    """
+    def __init__(
+            self,
+            start_date: datetime | str,
+            end_date: datetime | str,
+            unit: str = 'day',
+            step: int = 1,
+            alignment: Optional[datetime | str] = None,
+            max_tics: int = 100_000,
+    ):
+        """
+        :param unit: one of year, month, week, day, hour, minute, second, millisecond or microsecond
+        :param step: number of units between two tics
+        :param alignment: a date that is a tic position if it lies in the range
+                          (default: midnight of the first of January in year 0 for years and months,
+                          otherwise in year 1, which is a Monday)
+        :param max_tics: maximal number of tics that are generated
+        """
+        super().__init__(start_date=start_date, end_date=end_date, max_tics=max_tics)
+        if unit not in _FIXED_UNITS and unit not in _CALENDAR_UNITS:
+            raise ValueError(f"Unknown time unit '{unit}'")
+        if not isinstance(step, int) or step < 1:
+            raise ValueError("step needs to be a positive integer")
+        if alignment is not None and not isinstance(alignment, datetime):
+            alignment = dt(alignment)
+        self._unit = unit
+        self._step = step
+        self._alignment = alignment
+        if unit in _CALENDAR_UNITS:
+            # months are counted from January of the year 0
+            self._months = step * _CALENDAR_UNITS[unit]
+            offset = 0 if alignment is None else _month_index(alignment) % self._months
+            start_month = _month_index(self._start_date)
+            self._first_month = start_month + self._months - (start_month - offset) % self._months
+        else:
+            self._delta = step * _FIXED_UNITS[unit]
+            anchor = datetime.min if alignment is None else alignment
+            self._first = anchor + ((self._start_date - anchor) // self._delta + 1) * self._delta
+
+    def clipped(self, start_date: datetime, end_date: datetime) -> 'TimeSpacingEvery':
+        return type(self)(start_date, end_date, unit=self._unit, step=self._step, alignment=self._alignment,
+                          max_tics=self._max_tics)
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}({self._start_date!r}, {self._end_date!r}, '
+                f'unit={self._unit!r}, step={self._step!r}, alignment={self._alignment!r}, '
+                f'max_tics={self._max_tics!r})')
+
     @property
-    def dates(self) -> list[datetime]:
-        day_overflow, hour, minute, second = _normalize_time(hour=self.start_date.hour,
-                                                             minute=self.start_date.minute,
-                                                             second=self.start_date.second + 1)
-        date_tuple = _normalize_date(year=self.start_date.year,
-                                     month=self.start_date.month,
-                                     day=self.start_date.day + day_overflow)
-        date = datetime(*date_tuple, hour=hour, minute=minute, second=second)
-        dates = []
-        while date <= self.end_date:
-            dates.append(date)
-            day_overflow, hour, minute, second = _normalize_time(hour=date.hour,
-                                                                 minute=date.minute,
-                                                                 second=date.second + 1)
-            date_tuple = _normalize_date(year=date.year,
-                                         month=date.month,
-                                         day=date.day + day_overflow)
-            date = datetime(*date_tuple, hour=hour, minute=minute, second=second)
-        return dates
+    def unit(self) -> str:
+        """ the time unit of the step """
+        return self._unit
 
     @property
-    def labels(self) -> list[str]:
-        labels = [f"{date.hour:02}:{date.minute:02}:{date.second:02}" for date in self.dates]
-        return labels
+    def step(self) -> int:
+        """ the number of units between two tics """
+        return self._step
+
+    @property
+    def alignment(self) -> Optional[datetime]:
+        """ the date the tics are aligned to (None for the default alignment) """
+        return self._alignment
+
+    def _count(self) -> int:
+        if self._unit in _CALENDAR_UNITS:
+            return (_month_index(self._end_date) - self._first_month) // self._months + 1
+        return (self._end_date - self._first) // self._delta + 1
+
+    def _date_at(self, index: int) -> datetime:
+        if self._unit in _CALENDAR_UNITS:
+            month = self._first_month + index * self._months
+            return datetime(year=month // 12, month=month % 12 + 1, day=1)
+        return self._first + index * self._delta
+
+    def label(self, date: datetime) -> str:
+        if self._unit == 'year':
+            return str(date.year)
+        if self._unit == 'month':
+            return calendar.month_abbr[date.month]
+        if self._unit == 'week':
+            return f"{date.isocalendar().week:02}"
+        # the finest time component that differs between the tics
+        first = self._first
+        day_offset = first - first.replace(hour=0, minute=0, second=0, microsecond=0)
+        resolution = math.gcd(self._delta // _FIXED_UNITS['microsecond'],
+                              day_offset // _FIXED_UNITS['microsecond'])
+        if resolution % (24 * 3600 * 10**6) == 0:
+            return str(date.day)
+        if resolution % 60_000_000 == 0:
+            return f"{date.hour:02}:{date.minute:02}"
+        if resolution % 1_000_000 == 0:
+            return f"{date.hour:02}:{date.minute:02}:{date.second:02}"
+        if resolution % 1000 == 0:
+            return f"{date.hour:02}:{date.minute:02}:{date.second:02}.{date.microsecond // 1000:03}"
+        return f"{date.hour:02}:{date.minute:02}:{date.second:02}.{date.microsecond:06}"
+
+
+# steps for the automatic spacing, from fine to coarse, with their approximate duration
+_AUTO_STEPS = [
+    *(('microsecond', step) for step in (1, 2, 5, 10, 20, 50, 100, 250, 500)),
+    *(('millisecond', step) for step in (1, 2, 5, 10, 20, 50, 100, 250, 500)),
+    *(('second', step) for step in (1, 2, 5, 10, 15, 30)),
+    *(('minute', step) for step in (1, 2, 5, 10, 15, 30)),
+    *(('hour', step) for step in (1, 2, 3, 6, 12)),
+    ('day', 1), ('day', 2), ('week', 1), ('week', 2),
+    *(('month', step) for step in (1, 2, 3, 6)),
+    *(('year', step) for step in (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)),
+]
+_APPROXIMATE_UNITS = {**_FIXED_UNITS, 'month': timedelta(days=30.44), 'year': timedelta(days=365.25)}
+
+
+def auto_spacing(
+        start_date: datetime | str,
+        end_date: datetime | str,
+        length: float,
+        min_distance: float = 80,
+        divides: Optional[TimeSpacingEvery] = None,
+) -> TimeSpacingEvery:
+    """ pick the finest common spacing whose tics are at least min_distance apart on the canvas
+    :argument length distance between the start and the end date on the canvas
+    :argument min_distance minimal distance between two tics on the canvas
+    :argument divides only consider spacings whose tics include all tics of this spacing
+    """
+    start_date = start_date if isinstance(start_date, datetime) else dt(start_date)
+    end_date = end_date if isinstance(end_date, datetime) else dt(end_date)
+    min_step = (end_date - start_date) * (min_distance / length)
+    for unit, step in _AUTO_STEPS:
+        if step * _APPROXIMATE_UNITS[unit] < min_step:
+            continue
+        if divides is not None and not _steps_divide(unit, step, divides.unit, divides.step):
+            continue
+        return TimeSpacingEvery(start_date, end_date, unit=unit, step=step)
+    # coarser than all steps: use a power of ten of years
+    n_years = min_step / _APPROXIMATE_UNITS['year']
+    return TimeSpacingEvery(start_date, end_date, unit='year', step=10**math.ceil(math.log10(n_years)))
+
+
+def _steps_divide(unit: str, step: int, coarse_unit: str, coarse_step: int) -> bool:
+    """ check if every tic with the coarse step is also a tic with the (default aligned) step """
+    if coarse_unit in _CALENDAR_UNITS:
+        if unit in _CALENDAR_UNITS:
+            return (coarse_step * _CALENDAR_UNITS[coarse_unit]) % (step * _CALENDAR_UNITS[unit]) == 0
+        return timedelta(days=1) % (step * _FIXED_UNITS[unit]) == timedelta(0)
+    if unit in _CALENDAR_UNITS:
+        return False
+    return (coarse_step * _FIXED_UNITS[coarse_unit]) % (step * _FIXED_UNITS[unit]) == timedelta(0)
+
+
+def _month_index(date: datetime) -> int:
+    """ number of months between January of the year 0 and the month of the date """
+    return date.year * 12 + date.month - 1
@@ -1,15 +1,22 @@
 """ high level timeline API classes """
 from abc import ABC
-from dataclasses import dataclass
-from datetime import datetime
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from hashlib import blake2b
+from math import ceil, floor
 from pathlib import Path
-from typing import Optional, Self
+from threading import Lock
+from typing import Optional, Self, cast
 
-from svg_timeline.notation import dt
-from svg_timeline.svg import SvgFile, CascadeStyleSheet, Line, Text, Rectangle, Circle, Image, SvgGroup
+from svg_timeline.interval_index import IntervalIndex
+from svg_timeline.notation import as_datetime
+from svg_timeline.svg import SvgFile, CascadeStyleSheet, Line, Polyline, Text, Rectangle, Circle, Image, SvgGroup
+from svg_timeline.svg import ImageSymbol, SvgElement, active_id_counters, id_scope, open_svg_file
 from svg_timeline.svg_style_defaults import ClassNames
-from svg_timeline.time_spacing import TimeSpacing
-from svg_timeline.timeline_geometry import TimeLineGeometry
+from svg_timeline.time_spacing import IndexedTimeSpacing, TimeSpacing, TimeSpacingEvery, auto_spacing
+from svg_timeline.timeline_geometry import GeometrySettings, TimeLineGeometry
 from svg_timeline.vectors import Vector
 
 
@@ -19,15 +26,34 @@ class TimeLineElement(ABC):
         """ generate the SVG representation of this element """
         raise NotImplementedError
 
+    def time_extent(self) -> Optional[tuple[datetime, datetime]]:
+        """ the first and last date of this element
+        (None for elements that are not bound to dates, like the title)
+        """
+        return None
+
+    def clipped(self, start_date: datetime, end_date: datetime) -> Self:
+        """ a version of this element that is restricted to the given time range """
+        return self
+
 
 class TimelinePlot:
     """ representation of a timeline plot
     dates, timespans etc. can be added to this timeline via method calls
     """
     def __init__(self, geometry: TimeLineGeometry,
-                 layers: Optional[dict[int|str, list[TimeLineElement]]] = None,
+                 layers: Optional[Mapping[int, list[TimeLineElement]] | Mapping[str, list[TimeLineElement]]] = None,
                  css: Optional[CascadeStyleSheet] = None,
+                 fragment_cache: Optional['FragmentCache'] = None,
+                 cluster_width: Optional[float] = None,
+                 cluster_min_events: int = 3,
                  ):
+        """
+        :param fragment_cache: cache for the rendered elements, which can be shared between plots
+        :param cluster_width: width in pixels of the bins in which dense events are combined
+                              into a single EventCluster when rendering (default: no clustering)
+        :param cluster_min_events: minimal number of events on one lane of a bin to form a cluster
+        """
         self._layers: dict[int, list[TimeLineElement]] = dict()
         if layers is not None:
             for i_layer, elements in layers.items():
@@ -35,10 +61,96 @@ class TimelinePlot:
                 layer += elements
         self._css = css or CascadeStyleSheet()
         self._geometry = geometry
+        self._layer_cache: dict[int, _RenderedGroup] = {}
+        self._fragment_cache = fragment_cache
+        self._time_index: dict[int, _LayerTimeIndex] = {}
+        self._cluster_width = cluster_width
+        self._cluster_min_events = cluster_min_events
 
     def add_element(self, element: TimeLineElement, layer: int = 1) -> None:
         """ Add an element to one layer of this timeline plot """
-        self._layers.setdefault(layer, []).append(element)
+        # get the extent before changing anything, so the layer and its index stay in sync if it fails
+        extent = element.time_extent()
+        elements = self._layers.setdefault(layer, [])
+        index = self._time_index.get(layer)
+        if index is not None:
+            index.add(len(elements), extent)
+        elements.append(element)
+        self._layer_cache.pop(layer, None)
+
+    def elements_between(self, start_date: datetime | str, end_date: datetime | str) -> list[TimeLineElement]:
+        """ All elements whose time extent overlaps with the given range, in drawing order
+        Elements that are not bound to dates (e.g. the title) are not included.
+        """
+        start_date, end_date = as_datetime(start_date), as_datetime(end_date)
+        return [self._layers[i_layer][position]
+                for i_layer in sorted(self._layers)
+                for position in self._layer_index(i_layer).dated.overlapping(start_date, end_date)]
+
+    def element_at(self, coord: Vector, tolerance: float = 5) -> Optional[TimeLineElement]:
+        """ The element at the given coordinates of the plot (e.g. for tooltips)
+        Elements on the lane closest to the coordinates are preferred,
+        then the ones closest in time and finally the ones drawn on top.
+        :argument tolerance maximal distance in pixels along the time arrow
+        :return the element or None if there is no element at these coordinates
+        """
+        geometry = self._geometry
+        time_tolerance = (geometry.last - geometry.first) * (tolerance / geometry.axis_length)
+        date = geometry.coord_to_date(coord)
+        lane = geometry.coord_to_lane(coord)
+        best, best_key = None, None
+        for order, element in enumerate(self.elements_between(date - time_tolerance, date + time_tolerance)):
+            element_lane = getattr(element, 'lane', None)
+            if element_lane is None or abs(element_lane - lane) > 0.5:
+                continue
+            extent = element.time_extent()
+            assert extent is not None  # only dated elements are in the time index
+            first, last = extent
+            time_distance = max(first - date, date - last, timedelta(0))
+            key = (abs(element_lane - lane), time_distance, -order)
+            if best_key is None or key < best_key:
+                best, best_key = element, key
+        return best
+
+    def render_window(self, start_date: datetime | str, end_date: datetime | str,
+                      settings: Optional[GeometrySettings] = None) -> 'TimelinePlot':
+        """ A plot of a time window that shares the elements and style of this plot
+        Elements outside the window are left out and time spans are clipped to it.
+        :argument settings geometry settings of the window (default: the settings of this plot)
+        """
+        geometry = TimeLineGeometry(start_date, end_date, settings=settings or self._geometry.settings)
+        start_date, end_date = geometry.first, geometry.last
+        layers = {}
+        for i_layer, elements in self._layers.items():
+            index = self._layer_index(i_layer)
+            # keep the order of the elements within the layer
+            positions = sorted([*index.undated, *index.dated.overlapping(start_date, end_date)])
+            if positions:
+                layers[i_layer] = [elements[position].clipped(start_date, end_date) for position in positions]
+        return TimelinePlot(geometry=geometry, layers=layers, css=self._css, fragment_cache=self._fragment_cache,
+                            cluster_width=self._cluster_width, cluster_min_events=self._cluster_min_events)
+
+    def invalidate(self, layer: Optional[int] = None) -> None:
+        """ Discard the cached rendering of one layer (default: all layers)
+        This is only needed after elements of the plot were changed in place.
+        """
+        if layer is None:
+            self._layer_cache.clear()
+            self._time_index.clear()
+        else:
+            self._layer_cache.pop(layer, None)
+            self._time_index.pop(layer, None)
+
+    def _layer_index(self, layer: int) -> '_LayerTimeIndex':
+        """ the time index of one layer, which is built on first use and then kept up to date """
+        index = self._time_index.get(layer)
+        if index is None:
+            index = _LayerTimeIndex()
+            for position, element in enumerate(self._layers[layer]):
+                index.add(position, element.time_extent())
+            # only a complete index is kept
+            self._time_index[layer] = index
+        return index
 
     @property
     def layers(self) -> dict[int, list[TimeLineElement]]:
@@ -50,6 +162,31 @@ class TimelinePlot:
         """ the geometry settings of this plot """
         return self._geometry
 
+    @geometry.setter
+    def geometry(self, geometry: TimeLineGeometry) -> None:
+        self._geometry = geometry
+        self._layer_cache.clear()
+
+    @property
+    def cluster_width(self) -> Optional[float]:
+        """ width in pixels of the bins for clustering dense events (None: no clustering) """
+        return self._cluster_width
+
+    @cluster_width.setter
+    def cluster_width(self, cluster_width: Optional[float]) -> None:
+        self._cluster_width = cluster_width
+        self._layer_cache.clear()
+
+    @property
+    def cluster_min_events(self) -> int:
+        """ minimal number of events in one bin to combine them into a cluster """
+        return self._cluster_min_events
+
+    @cluster_min_events.setter
+    def cluster_min_events(self, cluster_min_events: int) -> None:
+        self._cluster_min_events = cluster_min_events
+        self._layer_cache.clear()
+
     @property
     def css(self) -> CascadeStyleSheet:
         """ the style sheet of this plot """
@@ -57,19 +194,88 @@ class TimelinePlot:
 
     @property
     def svg(self) -> SvgFile:
-        """ Return the SVG representation of this timeline """
+        """ Return the SVG representation of this timeline
+        The rendered layers are cached until elements are added to them.
+        The layer groups in the returned file are shared with this cache and must not be modified,
+        otherwise later renders of the plot change as well; add elements to the file instead.
+        """
         width, height = self._geometry.width, self._geometry.height
-        svg = SvgFile(width, height, css=self.css)
-        # first, set a white background
-        self.add_element(Background(), layer=0)
-        for i_layer, elements in sorted(self._layers.items()):
-            layer = Layer(elements=elements, index=i_layer)
-            svg.elements.append(layer.svg(self._geometry))
+        with id_scope() as id_counters:
+            svg = SvgFile(width, height, css=self.css, definitions=self._image_symbols())
+            svg.elements += self._rendered_layers(id_counters, cache=True)
         return svg
 
-    def save(self, file_path: Path):
-        """ Save an SVG of the timeline under the given file path """
-        self.svg.save_as(file_path=file_path)
+    def write_svg(self, stream, minify: bool = False, decimals: Optional[int] = None,
+                  prune_css: bool = False, cache: bool = False) -> None:
+        """ Render the timeline directly into a text or binary stream
+        Each element is rendered and written on its own,
+        so the memory usage is bounded by the largest single element instead of the whole plot.
+        The group IDs are counted per call, so the output is deterministic and thread-safe.
+        :argument minify leave out all insignificant whitespace
+        :argument decimals number of decimal places of all coordinates (None keeps the full precision)
+        :argument prune_css leave out CSS rules that are not used by any element
+                            (the full plot is rendered before writing in this case)
+        :argument cache keep the rendered layers for later renders (holds the full plot in memory);
+                        already cached layers are reused in any case
+        """
+        width, height = self._geometry.width, self._geometry.height
+        with id_scope() as id_counters:
+            svg = SvgFile(width, height, css=self.css, definitions=self._image_symbols(),
+                          minify=minify, decimals=decimals, prune_css=prune_css)
+            svg.write_to(stream, elements=self._rendered_layers(id_counters, cache=cache, lazy=not prune_css))
+
+    def _image_symbols(self) -> list[SvgElement]:
+        """ definitions for all image data that is shown more than once
+        (the images themselves are then written as references to these definitions)
+        """
+        counts = Counter(element.image_data
+                         for elements in self._layers.values()
+                         for element in elements if isinstance(element, DatedImage))
+        shared = [image_data for image_data, count in counts.items() if count > 1]
+        return [ImageSymbol(image_data, f'image_data_{i:03}') for i, image_data in enumerate(shared, start=1)]
+
+    def _rendered_layers(self, id_counters: dict[str, int],
+                         cache: bool = False, lazy: bool = False) -> Iterator[SvgGroup]:
+        """ the SVG groups of all layers (with the background at the bottom of layer 0)
+        Cached layers are reused as long as they would get the same group IDs as before.
+        :argument id_counters the group ID counters of the current render
+        :argument cache store newly rendered layers in the cache
+        :argument lazy render the elements of layers that are not cached only while they are written
+        """
+        layers = {0: [Background()]}
+        for i_layer, elements in self._layers.items():
+            layers[i_layer] = layers.get(i_layer, []) + elements
+        for i_layer, elements in sorted(layers.items()):
+            cached = self._layer_cache.get(i_layer)
+            if cached is not None and cached.matches(id_counters):
+                id_counters.update(cached.ids_after)
+                yield cached.group
+                continue
+            if self._cluster_width:
+                elements = _clustered(elements, self._geometry, self._cluster_width, self._cluster_min_events)
+            layer = Layer(elements=elements, index=i_layer)
+            if lazy and not cache:
+                yield layer.lazy_svg(self._geometry, fragment_cache=self._fragment_cache)
+                continue
+            ids_before = id_counters.copy()
+            group = layer.svg(self._geometry, fragment_cache=self._fragment_cache)
+            if cache:
+                self._layer_cache[i_layer] = _RenderedGroup.from_counters(group, ids_before, id_counters)
+            yield group
+
+    def save(self, file_path: Path, minify: bool = False, decimals: Optional[int] = None,
+             compress: Optional[bool] = None, compresslevel: int = 9, prune_css: bool = False,
+             cache: bool = False):
+        """ Save an SVG of the timeline under the given file path
+        :argument minify leave out all insignificant whitespace
+        :argument decimals number of decimal places of all coordinates (None keeps the full precision)
+        :argument compress write a gzip compressed file (default: only for the suffix .svgz)
+        :argument compresslevel gzip compression level from 1 (fastest) to 9 (smallest)
+        :argument prune_css leave out CSS rules that are not used by any element
+        :argument cache keep the rendered layers for later renders
+        """
+        with open_svg_file(file_path, compress=compress, compresslevel=compresslevel) as out_file:
+            self.write_svg(out_file, minify=minify, decimals=decimals, prune_css=prune_css, cache=cache)
 
     def display(self):
         """ Display the timeline in a jupyter notebook """
@@ -80,21 +286,156 @@ class TimelinePlot:
         display(SVG(self.svg.full))
 
 
+def _clustered(elements: list[TimeLineElement], geometry: TimeLineGeometry,
+               width: float, min_events: int) -> list[TimeLineElement]:
+    """ combine dense events into clusters
+    Events are binned per lane by their position along the time arrow.
+    Each bin with at least min_events events is replaced by an EventCluster
+    at the position of its first event, all other elements are kept as they are.
+    """
+    positions = [position for position, element in enumerate(elements) if type(element) is Event]
+    if len(positions) < min_events:
+        return elements
+    # bin by the distance along the time arrow, which also works for arrows that are not horizontal
+    first, span = geometry.first, geometry.last - geometry.first
+    relative_width = width / geometry.axis_length
+    bins: dict[tuple[float, int], list[int]] = {}
+    for position in positions:
+        event = elements[position]
+        n_bin = int((event.date - first) / span // relative_width)
+        bins.setdefault((event.lane, n_bin), []).append(position)
+    replaced: dict[int, Optional[EventCluster]] = {}
+    for members in bins.values():
+        if len(members) >= min_events:
+            replaced.update(dict.fromkeys(members))
+            replaced[members[0]] = EventCluster.from_events([elements[position] for position in members])
+    if not replaced:
+        return elements
+    clustered = []
+    for position, element in enumerate(elements):
+        if position not in replaced:
+            clustered.append(element)
+        elif replaced[position] is not None:
+            clustered.append(replaced[position])
+    return clustered
+
+
+class _LayerTimeIndex:
+    """ positions of the elements of one layer, indexed by their time extent """
+    def __init__(self):
+        self.undated: list[int] = []
+        self.dated: IntervalIndex[int] = IntervalIndex()
+
+    def add(self, position: int, extent: Optional[tuple[datetime, datetime]]) -> None:
+        if extent is None:
+            self.undated.append(position)
+        else:
+            self.dated.add(extent[0], extent[1], position)
+
+
+@dataclass
+class _RenderedGroup:
+    """ a cached rendering together with the group ID counters it used """
+    group: SvgGroup
+    ids_before: dict[str, int]
+    ids_after: dict[str, int]
+
+    @classmethod
+    def from_counters(cls, group: SvgGroup, before: dict[str, int], after: dict[str, int]) -> Self:
+        used = [base for base, count in after.items() if before.get(base) != count]
+        return cls(group=group,
+                   ids_before={base: before.get(base, 1) for base in used},
+                   ids_after={base: after[base] for base in used})
+
+    def matches(self, id_counters: dict[str, int]) -> bool:
+        """ check if rendering again would result in the same group IDs """
+        return all(id_counters.get(base, 1) == count for base, count in self.ids_before.items())
+
+
 Classes = Optional[list[str]]
 
 
+class FragmentCache:
+    """ bounded LRU cache for the SVG representation of timeline elements
+    Entries are keyed on a hash of the element's fields and the geometry settings,
+    so equal elements on plots with equal geometry are only rendered once.
+    A cached fragment is only reused if it gets the same group IDs as a new rendering,
+    which is usually the case for elements at the start of a plot (e.g. title and time arrow).
+    The cached fragments are shared and must not be modified.
+    """
+    def __init__(self, max_entries: int = 4096):
+        """
+        :param max_entries: upper limit for the number of cached fragments
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, _RenderedGroup] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(element: TimeLineElement, geometry: TimeLineGeometry) -> bytes:
+        """ stable hash of an element together with the geometry it is rendered in """
+        description = repr((element, geometry.first, geometry.last, geometry.settings))
+        return blake2b(description.encode(), digest_size=16).digest()
+
+    def render(self, element: TimeLineElement, geometry: TimeLineGeometry) -> SvgGroup:
+        """ the SVG representation of the element, rendered only if necessary """
+        key = self.key(element, geometry)
+        id_counters = active_id_counters()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.matches(id_counters):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                id_counters.update(entry.ids_after)
+                return entry.group
+            self.misses += 1
+        ids_before = id_counters.copy()
+        group = element.svg(geometry)
+        with self._lock:
+            self._entries[key] = _RenderedGroup.from_counters(group, ids_before, id_counters)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return group
+
+    def clear(self) -> None:
+        """ remove all entries and reset the hit and miss counters """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def _render(element: TimeLineElement, geometry: TimeLineGeometry,
+            fragment_cache: Optional[FragmentCache]) -> SvgGroup:
+    if fragment_cache is None:
+        return element.svg(geometry)
+    return fragment_cache.render(element, geometry)
+
+
 @dataclass
 class Layer(TimeLineElement):
     """ a layer of the plot """
     elements: list[TimeLineElement]
     index: int
 
-    def svg(self, geometry: TimeLineGeometry) -> SvgGroup:
+    def svg(self, geometry: TimeLineGeometry, fragment_cache: Optional['FragmentCache'] = None) -> SvgGroup:
         layer = SvgGroup(exact_id=f'layer_{self.index:03}')
         for element in self.elements:
-            layer.append(element.svg(geometry))
+            layer.append(_render(element, geometry, fragment_cache))
         return layer
 
+    def lazy_svg(self, geometry: TimeLineGeometry, fragment_cache: Optional['FragmentCache'] = None) -> SvgGroup:
+        """ SVG representation of the layer whose elements are only rendered
+        one at a time while the layer is serialized """
+        elements = (_render(element, geometry, fragment_cache) for element in self.elements)
+        return SvgGroup(elements, exact_id=f'layer_{self.index:03}')
+
 
 @dataclass
 class Background(TimeLineElement):
@@ -139,8 +480,9 @@ class TimeArrowTics(TimeLineElement):
         classes += [ClassNames.TIME_ARROW, f'c{self.palette_color:02}']
         tic_delta = (-10 if self.major else -5) * geometry.lane_normal
         tic_group = SvgGroup(id_base='tics')
-        for date, label in zip(self.spacing.dates, self.spacing.labels):
-            tic_base = geometry.as_coord(date)
+        xs, ys = geometry.as_coords(self.spacing.dates)
+        for x, y, label in zip(xs, ys, self.spacing.labels):
+            tic_base = Vector(x, y)
             tic_end = tic_base + tic_delta
             tic_classes = classes + [ClassNames.TIME_ARROW_MAJOR_TIC if self.major else
                                      ClassNames.TIME_ARROW_MINOR_TIC]
@@ -153,11 +495,47 @@ class TimeArrowTics(TimeLineElement):
 
 @dataclass
 class TimeArrow(TimeLineElement):
-    """ the timeline arrow with major and minor tics """
-    major_tics: TimeSpacing
-    minor_tics: Optional[TimeSpacing] = None
+    """ the timeline arrow with major and minor tics
+    The tics can be given as 'auto' to choose a spacing that fits the geometry.
+    """
+    major_tics: TimeSpacing | str = 'auto'
+    minor_tics: Optional[TimeSpacing | str] = None
     palette_color: int = 0
     classes: Classes = None
+    # minimal distance between automatically spaced tics on the canvas
+    auto_major_distance: float = 80
+    auto_minor_distance: float = 15
+    # replace spacings with more than their max_tics tics by automatic ones instead of raising
+    downgrade_dense_tics: bool = False
+
+    def __post_init__(self):
+        for tics in (self.major_tics, self.minor_tics):
+            if isinstance(tics, str) and tics != 'auto':
+                raise ValueError(f"Tics need to be a TimeSpacing or 'auto', not '{tics}'")
+
+    def clipped(self, start_date: datetime, end_date: datetime) -> Self:
+        major, minor = self.major_tics, self.minor_tics
+        return replace(self,
+                       major_tics=major if isinstance(major, str) else major.clipped(start_date, end_date),
+                       minor_tics=minor if minor is None or isinstance(minor, str) else minor.clipped(start_date, end_date))
+
+    def spacings(self, geometry: TimeLineGeometry) -> tuple[TimeSpacing, Optional[TimeSpacing]]:
+        """ the major and minor tic spacings that are used within the given geometry """
+        length = geometry.axis_length
+        major = self.major_tics
+        # strings other than 'auto' are rejected in __post_init__
+        if not isinstance(major, TimeSpacing) or self._too_dense(major):
+            major = auto_spacing(geometry.first, geometry.last, length, min_distance=self.auto_major_distance)
+        minor = self.minor_tics
+        if minor is not None and (not isinstance(minor, TimeSpacing) or self._too_dense(minor)):
+            minor = auto_spacing(geometry.first, geometry.last, length, min_distance=self.auto_minor_distance,
+                                 divides=major if isinstance(major, TimeSpacingEvery) else None)
+        return major, minor
+
+    def _too_dense(self, spacing: Optional[TimeSpacing | str]) -> bool:
+        if not self.downgrade_dense_tics or not isinstance(spacing, IndexedTimeSpacing):
+            return False
+        return len(spacing) > spacing.max_tics
 
     def svg(self, geometry: TimeLineGeometry) -> SvgGroup:
         classes = self.classes.copy() if self.classes else []
@@ -167,11 +545,12 @@ class TimeArrow(TimeLineElement):
         target = geometry.as_coord(geometry.last, lane=0)
         line = Line(source, target, classes=classes + [ClassNames.TIME_ARROW_AXIS, ClassNames.COLORED])
         timeline.append(line)
-        major_tics = TimeArrowTics(spacing=self.major_tics, major=True,
+        major_spacing, minor_spacing = self.spacings(geometry)
+        major_tics = TimeArrowTics(spacing=major_spacing, major=True,
                                    palette_color=self.palette_color, classes=self.classes)
         timeline.append(major_tics.svg(geometry=geometry))
-        if self.minor_tics is not None:
-            minor_tics = TimeArrowTics(spacing=self.minor_tics, major=False,
+        if minor_spacing is not None:
+            minor_tics = TimeArrowTics(spacing=minor_spacing, major=False,
                                        palette_color=self.palette_color, classes=self.classes)
             timeline.append(minor_tics.svg(geometry=geometry))
         return timeline
@@ -187,6 +566,13 @@ class Event(TimeLineElement):
     palette_color: int = 0
     classes: Classes = None
 
+    def __post_init__(self):
+        self.date = as_datetime(self.date)
+
+    def time_extent(self) -> tuple[datetime, datetime]:
+        date = as_datetime(self.date)
+        return date, date
+
     def svg(self, geometry: TimeLineGeometry) -> SvgGroup:
         classes = self.classes.copy() if self.classes else []
         classes += [ClassNames.EVENT, f'c{self.palette_color:02}']
@@ -201,9 +587,56 @@ class Event(TimeLineElement):
         return event
 
 
+@dataclass
+class EventCluster(TimeLineElement):
+    """ a marker that stands for many events which are too close to each other to be shown individually """
+    first_date: datetime | str
+    last_date: datetime | str
+    count: int
+    dot_radius: float = 5
+    lane: float = 1
+    palette_color: int = 0
+    classes: Classes = None
+
+    @classmethod
+    def from_events(cls, events: list[Event]) -> Self:
+        """ a cluster of the given events on their common lane """
+        dates = [event.date for event in events]
+        palette_colors = {event.palette_color for event in events}
+        return cls(first_date=min(dates), last_date=max(dates), count=len(events),
+                   dot_radius=2 * max(event.dot_radius for event in events), lane=events[0].lane,
+                   palette_color=palette_colors.pop() if len(palette_colors) == 1 else 0)
+
+    def __post_init__(self):
+        self.first_date = as_datetime(self.first_date)
+        self.last_date = as_datetime(self.last_date)
+
+    def time_extent(self) -> tuple[datetime, datetime]:
+        return as_datetime(self.first_date), as_datetime(self.last_date)
+
+    def svg(self, geometry: TimeLineGeometry) -> SvgGroup:
+        classes = self.classes.copy() if self.classes else []
+        classes += [ClassNames.EVENT, ClassNames.EVENT_CLUSTER, f'c{self.palette_color:02}']
+        first_date, last_date = self.time_extent()
+        date = first_date + (last_date - first_date) / 2
+        event_base = geometry.as_coord(date)
+        event_end = geometry.as_coord(date, lane=self.lane)
+        text_coord = geometry.as_coord(date, lane=(self.lane + 0.5 if self.lane >= 0 else self.lane - 0.5))
+        cluster = SvgGroup([
+            Line(source=event_base, target=event_end, classes=classes + [ClassNames.COLORED]),
+            Circle(center=event_end, radius=self.dot_radius, classes=classes + [ClassNames.COLORED]),
+            Text(text_coord, f'{self.count} events', classes=classes),
+        ], id_base='event_cluster')
+        return cluster
+
+
 @dataclass
 class ConnectedEvents(TimeLineElement):
-    """ a series of events connected via lines """
+    """ a series of events connected via lines
+    For long series, as_path draws all connecting lines as one path
+    (with the classes and color of the first event) instead of one line per pair of events,
+    and downsample leaves out unlabelled events that fall into the same pixel along the time arrow.
+    """
     dates: list[datetime | str]
     labels: list[str | None]
     dot_radius: float = 3
@@ -211,8 +644,11 @@ class ConnectedEvents(TimeLineElement):
     palette_colors: list[int] | int = 0
     common_classes: Optional[Classes] = None
     individual_classes: Optional[list[Classes]] = None
+    as_path: bool = False
+    downsample: bool = False
 
     def __post_init__(self):
+        self.dates = [as_datetime(date) for date in self.dates]
         # fill defaults for optional attributes:
         self.common_classes = self.common_classes or []
         if self.individual_classes is None:
@@ -226,28 +662,125 @@ class ConnectedEvents(TimeLineElement):
         """ combine the common classes with the individual ones for each event """
         return [self.common_classes + individual for individual in self.individual_classes]
 
+    @property
+    def _datetimes(self) -> list[datetime]:
+        """ the dates, which are converted to datetime objects in __post_init__ """
+        return cast(list[datetime], self.dates)
+
+    def time_extent(self) -> Optional[tuple[datetime, datetime]]:
+        if not self.dates:
+            return None
+        return min(self._datetimes), max(self._datetimes)
+
+    def clipped(self, start_date: datetime, end_date: datetime) -> Self:
+        # keep the last event before and the first event after the range,
+        # so the connecting lines still leave the canvas
+        dates = self._datetimes
+        first = max((i for i, date in enumerate(dates) if date < start_date), default=0)
+        last = min((i for i, date in enumerate(dates) if date > end_date), default=len(dates) - 1)
+        if first >= last or (first == 0 and last == len(dates) - 1):
+            return self
+        palette_colors = self.palette_colors
+        if not isinstance(palette_colors, int):
+            palette_colors = palette_colors[first:last + 1]
+        assert self.individual_classes is not None  # filled in __post_init__
+        return replace(self, dates=self.dates[first:last + 1], labels=self.labels[first:last + 1],
+                       palette_colors=palette_colors, individual_classes=self.individual_classes[first:last + 1])
+
+    def visible_indices(self, geometry: TimeLineGeometry) -> list[int]:
+        """ indices of the events that are needed to draw the series at the resolution of the geometry
+        Of each run of consecutive events within one pixel along the time arrow,
+        only the first and the last one and all labelled ones are kept.
+        """
+        first = geometry.first
+        pixel_duration = max((geometry.last - first) / geometry.axis_length, timedelta(microseconds=1))
+        pixels = [(date - first) // pixel_duration for date in self._datetimes]
+        labels = self.labels
+        indices = []
+        previous_pixel = None
+        for i, pixel in enumerate(pixels):
+            if pixel != previous_pixel:
+                if indices and indices[-1] != i - 1:
+                    indices.append(i - 1)
+                indices.append(i)
+                previous_pixel = pixel
+            elif labels[i] is not None:
+                indices.append(i)
+        if indices and indices[-1] != len(pixels) - 1:
+            indices.append(len(pixels) - 1)
+        return indices
+
     def svg(self, geometry: TimeLineGeometry) -> SvgGroup:
+        series = self
+        if self.downsample:
+            indices = self.visible_indices(geometry)
+            if len(indices) < len(self.dates):
+                series = self._subset(indices)
+        if self.as_path:
+            return series._svg_as_path(geometry)
+        return series._svg_per_event(geometry)
+
+    def _subset(self, indices: list[int]) -> Self:
+        """ a copy of this series with only the events at the given indices """
+        palette_colors = self.palette_colors
+        if not isinstance(palette_colors, int):
+            palette_colors = [palette_colors[i] for i in indices]
+        assert self.individual_classes is not None  # filled in __post_init__
+        return replace(self, dates=[self.dates[i] for i in indices], labels=[self.labels[i] for i in indices],
+                       palette_colors=palette_colors,
+                       individual_classes=[self.individual_classes[i] for i in indices])
+
+    def _svg_as_path(self, geometry: TimeLineGeometry) -> SvgGroup:
+        n_dates = len(self.dates)
+        palette_colors = [self.palette_colors] * n_dates if isinstance(self.palette_colors, int) else self.palette_colors
+        classes = [event_classes + [ClassNames.CONNECTED_EVENTS] for event_classes in self.classes]
+        xs, ys = geometry.as_coords(self.dates, lanes=self.lane)
+        text_lane = self.lane + 0.5 if self.lane >= 0 else self.lane - 0.5
+        text_xs, text_ys = geometry.as_coords(self.dates, lanes=text_lane)
+        elements = []
+        if n_dates:
+            elements.append(Polyline(xs, ys, classes=classes[0] + [f'c{palette_colors[0]:02}', ClassNames.COLORED]))
+        for i, label in enumerate(self.labels):
+            if label is None:
+                continue
+            elements.append(Circle(
+                center=Vector(xs[i], ys[i]),
+                radius=self.dot_radius,
+                classes=classes[i] + [f'c{palette_colors[i]:02}', ClassNames.COLORED],
+            ))
+            elements.append(Text(
+                coord=Vector(text_xs[i], text_ys[i]),
+                text=label,
+                classes=classes[i] + [ClassNames.COLORED],
+            ))
+        return SvgGroup(elements, id_base='connected_events')
+
+    def _svg_per_event(self, geometry: TimeLineGeometry) -> SvgGroup:
         palette_colors = [self.palette_colors for _ in range(len(self.dates))] if isinstance(self.palette_colors, int) else self.palette_colors
         classes = self.classes.copy() if self.classes else []
         classes += [ClassNames.CONNECTED_EVENTS]
         n_dates = len(self.dates)
         groups = [[] for _ in range(n_dates)]
+        xs, ys = geometry.as_coords(self.dates, lanes=self.lane)
+        points = [Vector(x, y) for x, y in zip(xs, ys)]
+        text_lane = self.lane + 0.5 if self.lane >= 0 else self.lane - 0.5
+        text_xs, text_ys = geometry.as_coords(self.dates, lanes=text_lane)
         for i in range(n_dates - 1):
             groups[i].append(Line(
-                source=geometry.as_coord(self.dates[i], lane=self.lane),
-                target=geometry.as_coord(self.dates[i + 1], lane=self.lane),
+                source=points[i],
+                target=points[i + 1],
                 classes=classes[i] + [f'c{palette_colors[i]:02}', ClassNames.COLORED],
             ))
         for i, label in enumerate(self.labels):
             if label is None:
                 continue
             groups[i].append(Circle(
-                center=geometry.as_coord(self.dates[i], lane=self.lane),
+                center=points[i],
                 radius=self.dot_radius,
                 classes=classes[i] + [f'c{palette_colors[i]:02}', ClassNames.COLORED],
             ))
             groups[i].append(Text(
-                coord=geometry.as_coord(self.dates[i], lane=(self.lane + 0.5 if self.lane >= 0 else self.lane - 0.5)),
+                coord=Vector(text_xs[i], text_ys[i]),
                 text=label,
                 classes=classes[i] + [ClassNames.COLORED],
             ))
@@ -266,6 +799,9 @@ class DatedImage(TimeLineElement):
     palette_color: int = 0
     classes: Classes = None
 
+    def __post_init__(self):
+        self.date = as_datetime(self.date)
+
     @classmethod
     def from_path(cls, date: datetime | str, file_path: Path, width: float, height: float,
                   lane: float = 1, palette_color: int = 0, classes: Classes = None) -> Self:
@@ -274,6 +810,10 @@ class DatedImage(TimeLineElement):
         return cls(date=date, image_data=xlink_href, height=height, width=width,
                    lane=lane, palette_color=palette_color, classes=classes)
 
+    def time_extent(self) -> tuple[datetime, datetime]:
+        date = as_datetime(self.date)
+        return date, date
+
     def svg(self, geometry: TimeLineGeometry) -> SvgGroup:
         classes = self.classes.copy() if self.classes else []
         classes += [ClassNames.IMAGE, f'c{self.palette_color:02}']
@@ -300,9 +840,23 @@ class TimeSpan(TimeLineElement):
     palette_color: int = 0
     classes: Classes = None
 
+    def __post_init__(self):
+        self.start_date = as_datetime(self.start_date)
+        self.end_date = as_datetime(self.end_date)
+
+    def time_extent(self) -> tuple[datetime, datetime]:
+        # a span can be given with its dates in either order
+        start_date, end_date = as_datetime(self.start_date), as_datetime(self.end_date)
+        return min(start_date, end_date), max(start_date, end_date)
+
+    def clipped(self, start_date: datetime, end_date: datetime) -> Self:
+        first, last = self.time_extent()
+        if start_date <= first and last <= end_date:
+            return self
+        return replace(self, start_date=max(first, start_date), end_date=min(last, end_date))
+
     def svg(self, geometry: TimeLineGeometry) -> SvgGroup:
-        start_date = dt(self.start_date) if isinstance(self.start_date, str) else self.start_date
-        end_date = dt(self.end_date) if isinstance(self.end_date, str) else self.end_date
+        start_date, end_date = self.time_extent()
         classes = self.classes.copy() if self.classes else []
         classes += [ClassNames.TIMESPAN, f'c{self.palette_color:02}']
         # if no explicit width is set, fill 60% of a lane
@@ -317,3 +871,81 @@ class TimeSpan(TimeLineElement):
             Text(text_coord, self.text, classes=classes + [ClassNames.TOP_TEXT]),
         ], id_base='timespan')
         return timespan
+
+
+@dataclass
+class EventDensity(TimeLineElement):
+    """ the number of events per time bin, drawn as bars or as an area on a lane
+    Only the counts are stored, so the element stays small for any number of events.
+    """
+    start_date: datetime | str
+    end_date: datetime | str
+    counts: list[int]
+    lane: float = 1
+    height: Optional[float] = None
+    max_count: Optional[int] = None
+    as_area: bool = False
+    palette_color: int = 0
+    classes: Classes = None
+
+    def __post_init__(self):
+        self.start_date = as_datetime(self.start_date)
+        self.end_date = as_datetime(self.end_date)
+        if self.end_date <= self.start_date:
+            raise ValueError("the end date needs to be after the start date")
+        if len(self.counts) == 0:
+            raise ValueError("at least one bin is needed")
+
+    @classmethod
+    def from_timestamps(cls, timestamps: Iterable[datetime | str], geometry: TimeLineGeometry,
+                        bin_width: float = 2, **kwargs) -> Self:
+        """ count the timestamps in bins of bin_width pixels along the time arrow of the geometry
+        The timestamps can be unsorted and are counted in a single pass (see TimeLineGeometry.histogram).
+        :argument kwargs further attributes of the element, like the lane or the palette color
+        """
+        n_bins = max(1, round(geometry.axis_length / bin_width))
+        counts = geometry.histogram(timestamps, n_bins)
+        return cls(start_date=geometry.first, end_date=geometry.last, counts=counts, **kwargs)
+
+    def time_extent(self) -> tuple[datetime, datetime]:
+        return as_datetime(self.start_date), as_datetime(self.end_date)
+
+    def clipped(self, start_date: datetime, end_date: datetime) -> Self:
+        # keep whole bins, and the scale of the full element
+        n_bins = len(self.counts)
+        full_start, full_end = self.time_extent()
+        bin_duration = (full_end - full_start) / n_bins
+        # a window that only touches the first or last date still keeps that bin
+        first = min(n_bins - 1, max(0, floor((start_date - full_start) / bin_duration)))
+        last = min(n_bins, max(first + 1, ceil((end_date - full_start) / bin_duration)))
+        if first == 0 and last == n_bins:
+            return self
+        return replace(self, start_date=full_start + first * bin_duration,
+                       end_date=full_end if last == n_bins else full_start + last * bin_duration,
+                       counts=self.counts[first:last], max_count=self.max_count or max(self.counts))
+
+    def svg(self, geometry: TimeLineGeometry) -> SvgGroup:
+        classes = self.classes.copy() if self.classes else []
+        classes += [ClassNames.EVENT_DENSITY, f'c{self.palette_color:02}', ClassNames.COLORED]
+        n_bins = len(self.counts)
+        start_date, end_date = self.time_extent()
+        bin_duration = (end_date - start_date) / n_bins
+        # the bars grow away from the time arrow, the largest count fills the height
+        height = self.height or 0.8 * geometry.settings.lane_height
+        direction = 1 if self.lane >= 0 else -1
+        lanes_per_count = direction * height / geometry.settings.lane_height / (self.max_count or max(self.counts) or 1)
+        dates = [start_date]
+        lanes = [self.lane]
+        for i_bin, count in enumerate(self.counts):
+            bin_start = start_date + i_bin * bin_duration
+            top = self.lane + count * lanes_per_count
+            if self.as_area:
+                dates.append(bin_start + bin_duration / 2)
+                lanes.append(top)
+            else:
+                dates += [bin_start, bin_start + bin_duration]
+                lanes += [top, top]
+        dates.append(end_date)
+        lanes.append(self.lane)
+        xs, ys = geometry.as_coords(dates, lanes)
+        return SvgGroup([Polyline(xs, ys, classes=classes)], id_base='event_density')
@@ -1,11 +1,18 @@
 """ classes that define the geometry of the timeline plot """
+from array import array
+from collections.abc import Iterable
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
 from svg_timeline.vectors import Vector
 from svg_timeline.notation import dt
 
+try:
+    import numpy
+except ImportError:  # optional: only used for the vectorized handling of NumPy arrays
+    numpy = None  # type: ignore[assignment]
+
 
 @dataclass
 class GeometrySettings:
@@ -17,6 +24,9 @@ class GeometrySettings:
     lane_height: float = 30
 
 
+_MICROSECOND = timedelta(microseconds=1)
+
+
 class TimeLineGeometry:
     """ class for the transfer of dates and lanes to canvas coordinates """
     def __init__(
@@ -37,6 +47,19 @@ class TimeLineGeometry:
         x2 = (1 - self._settings.canvas_x_padding) * self._settings.canvas_width
         self._gradient = TimeGradient(source=Vector(x1, y), target=Vector(x2, y),
                                       start_date=start_date, end_date=end_date)
+        # affine transform of (relative position, lane offset) into canvas coordinates
+        # as a 2x3 matrix (row-wise) together with its inverse
+        source, target = self._gradient.source, self._gradient.target
+        self._lane_normal = (target - source).orthogonal(ccw=True)
+        x_scale, y_scale = target.x - source.x, target.y - source.y
+        x_lane, y_lane = self._lane_normal.x, self._lane_normal.y
+        self._transform = (x_scale, x_lane, source.x,
+                           y_scale, y_lane, source.y)
+        determinant = x_scale * y_lane - x_lane * y_scale
+        self._inverse = (y_lane / determinant, -x_lane / determinant,
+                         (x_lane * source.y - y_lane * source.x) / determinant,
+                         -y_scale / determinant, x_scale / determinant,
+                         (y_scale * source.x - x_scale * source.y) / determinant)
 
     @property
     def settings(self) -> GeometrySettings:
@@ -68,15 +91,91 @@ class TimeLineGeometry:
         """ Normal vector orthogonal to the timeline direction
         This vector is used to calculate the positions of the different lanes.
         """
-        return (self._gradient.target - self._gradient.source).orthogonal(ccw=True)
+        return self._lane_normal
 
     def as_coord(self, date: datetime | str, lane: float = 0) -> Vector:
         """ return the coordinates responding to this date on a given lane
         (default: on the time arrow)
         """
-        date_coord = self._gradient.date_to_coord(date)
-        lane_point = date_coord + lane * self._settings.lane_height * self.lane_normal
-        return lane_point
+        relative = self._gradient.date_to_relative(date)
+        lane_offset = lane * self._settings.lane_height
+        x_scale, x_lane, x_offset, y_scale, y_lane, y_offset = self._transform
+        return Vector((x_offset + relative * x_scale) + lane_offset * x_lane,
+                      (y_offset + relative * y_scale) + lane_offset * y_lane)
+
+    def coord_to_relative(self, coord: Vector) -> float:
+        """ return the relative position on the timeline that corresponds to the coordinates """
+        x_x, x_y, x_offset = self._inverse[:3]
+        return x_x * coord.x + x_y * coord.y + x_offset
+
+    def coord_to_lane(self, coord: Vector) -> float:
+        """ return the (fractional) lane that corresponds to the coordinates """
+        y_x, y_y, y_offset = self._inverse[3:]
+        return (y_x * coord.x + y_y * coord.y + y_offset) / self._settings.lane_height
+
+    def coord_to_date(self, coord: Vector) -> datetime:
+        """ return the date that corresponds to the coordinates """
+        return self._gradient.relative_to_date(self.coord_to_relative(coord))
+
+    def as_coords(self, dates: Iterable[datetime | str],
+                  lanes: float | Iterable[float] = 0) -> tuple[array, array]:
+        """ return the coordinates of many dates at once (see as_coord)
+        A NumPy datetime64 array of dates is transformed vectorized and gives NumPy arrays.
+        :argument dates the dates to transform
+        :argument lanes either one lane for all dates or one lane per date
+        :return the x and the y coordinates as two arrays of floats
+        """
+        x_scale, x_lane, x_offset, y_scale, y_lane, y_offset = self._transform
+        lane_height = self._settings.lane_height
+        first, last = self._gradient.start_date, self._gradient.end_date
+        if numpy is not None and isinstance(dates, numpy.ndarray):
+            microseconds = dates.astype('datetime64[us]') - numpy.datetime64(first, 'us')
+            relative = microseconds.astype('int64') / ((last - first) // _MICROSECOND)
+            lane_offsets = numpy.asarray(lanes, dtype=float) * lane_height
+            return (x_offset + relative * x_scale) + lane_offsets * x_lane, \
+                (y_offset + relative * y_scale) + lane_offsets * y_lane
+        span = last - first
+        relative = [((dt(date) if isinstance(date, str) else date) - first) / span for date in dates]
+        if isinstance(lanes, (int, float)):
+            lane_offsets = [lanes * lane_height] * len(relative)
+        else:
+            lane_offsets = [lane * lane_height for lane in lanes]
+            if len(lane_offsets) != len(relative):
+                raise ValueError("the number of lanes has to match the number of dates")
+        xs = array('d', [(x_offset + rel * x_scale) + offset * x_lane for rel, offset in zip(relative, lane_offsets)])
+        ys = array('d', [(y_offset + rel * y_scale) + offset * y_lane for rel, offset in zip(relative, lane_offsets)])
+        return xs, ys
+
+    @property
+    def axis_length(self) -> float:
+        """ length of the time arrow from the first to the last date in pixels """
+        x_scale, _, _, y_scale, _, _ = self._transform
+        return (x_scale**2 + y_scale**2) ** 0.5
+
+    def histogram(self, dates: Iterable[datetime | str], n_bins: int) -> list[int]:
+        """ count the dates in n_bins bins of equal length from the first to the last date
+        The dates are counted in a single pass in any order, dates outside of the geometry are left out.
+        A NumPy datetime64 array of dates is counted vectorized.
+        """
+        if n_bins < 1:
+            raise ValueError("the number of bins has to be positive")
+        first = self._gradient.start_date
+        span = (self._gradient.end_date - first) // _MICROSECOND
+        if numpy is not None and isinstance(dates, numpy.ndarray):
+            microseconds = (dates.astype('datetime64[us]') - numpy.datetime64(first, 'us')).astype('int64')
+            inside = microseconds[(microseconds >= 0) & (microseconds <= span)]
+            if span * n_bins < 2**63:
+                bins = inside * n_bins // span
+            else:  # the exact integer product would overflow
+                bins = (inside / span * n_bins).astype('int64')
+            return numpy.bincount(numpy.minimum(bins, n_bins - 1), minlength=n_bins).tolist()
+        counts = [0] * n_bins
+        for date in dates:
+            microseconds = ((dt(date) if isinstance(date, str) else date) - first) // _MICROSECOND
+            if 0 <= microseconds <= span:
+                # the last date belongs to the last bin
+                counts[min(microseconds * n_bins // span, n_bins - 1)] += 1
+        return counts
 
 
 class TimeGradient:
@@ -98,6 +197,9 @@ class TimeGradient:
         self._target = target
         self._start_date = start_date if isinstance(start_date, datetime) else dt(start_date)
         self._end_date = end_date if isinstance(end_date, datetime) else dt(end_date)
+        self._span = self._end_date - self._start_date
+        self._delta = target - source
+        self._delta_squared = self._delta.x**2 + self._delta.y**2
 
     @property
     def source(self) -> Vector:
@@ -131,15 +233,12 @@ class TimeGradient:
         # (simplifies the following calculations)
         coord_x = coord.x - self._source.x
         coord_y = coord.y - self._source.y
-        end_x = self._target.x - self._source.x
-        end_y = self._target.y - self._source.y
         # Given a scalar factor 'a', minimize the length of vector 'coord - a * end'.
         # 'a' then describes the relative position on this timeline with the
         # shortest distance to the given coordinates.
         # Solved analytically, this gives:
-        numerator = coord_x * end_x + coord_y * end_y
-        denominator = end_x**2 + end_y**2
-        a = numerator / denominator
+        numerator = coord_x * self._delta.x + coord_y * self._delta.y
+        a = numerator / self._delta_squared
         return a
 
     def date_to_coord(self, date: datetime | str) -> Vector:
@@ -150,19 +249,15 @@ class TimeGradient:
         """ transform a date into a relative position on the timeline """
         if isinstance(date, str):
             date = dt(date)
-        self_delta = self._end_date - self._start_date
-        date_delta = date - self.start_date
-        return date_delta / self_delta
+        return (date - self._start_date) / self._span
 
     def relative_to_coord(self, relative_position: float) -> Vector:
         """ transform a relative position on the timeline
         into an absolute position on the canvas
         """
-        delta = self._target - self._source
-        scaled_vector = self._source + (relative_position * delta)
-        return scaled_vector
+        return Vector(self._source.x + relative_position * self._delta.x,
+                      self._source.y + relative_position * self._delta.y)
 
     def relative_to_date(self, relative_position: float) -> datetime:
         """ transform a relative position on the timeline into a date """
-        delta = self._end_date - self._start_date
-        return self._start_date + relative_position * delta
+        return self._start_date + relative_position * self._span
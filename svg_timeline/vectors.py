@@ -7,6 +7,8 @@ COORD_TOLERANCE = 0.000_001
 
 class Vector:
     """ a vector (or point) within a canvas """
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
@@ -0,0 +1,39 @@
+""" test cases for the interval index """
+from datetime import datetime, timedelta
+from random import Random
+
+from pytest import raises
+
+from svg_timeline.interval_index import IntervalIndex
+
+
+def test_overlapping_matches_linear_scan():
+    """ queries give the same items as a linear scan, in insertion order """
+    rng = Random(42)
+    origin = datetime(2000, 1, 1)
+    intervals = []
+    index = IntervalIndex()
+    for item in range(2000):
+        start = origin + timedelta(days=rng.uniform(0, 3650))
+        duration = timedelta(seconds=rng.choice([0, 1, 60, 86400 * rng.uniform(0, 2000)]))
+        intervals.append((start, start + duration))
+        index.add(start, start + duration, item)
+    assert len(index) == 2000
+    for _ in range(50):
+        start = origin + timedelta(days=rng.uniform(-100, 3700))
+        end = start + timedelta(days=rng.uniform(0, 300))
+        expected = [item for item, (first, last) in enumerate(intervals) if first <= end and last >= start]
+        assert index.overlapping(start, end) == expected
+        # adding in between queries keeps the index up to date
+        index.add(start, start, len(intervals))
+        intervals.append((start, start))
+
+
+def test_boundaries():
+    index = IntervalIndex()
+    index.add(datetime.min, datetime(2000, 1, 1), 'from the beginning')
+    index.add(datetime(2001, 1, 1), datetime(2001, 1, 1), 'point')
+    assert index.overlapping(datetime(2000, 1, 1), datetime(2001, 1, 1)) == ['from the beginning', 'point']
+    assert index.overlapping(datetime(2000, 1, 2), datetime(2000, 12, 31)) == []
+    with raises(ValueError):
+        index.add(datetime(2001, 1, 1), datetime(2000, 1, 1), 'reversed')
@@ -3,8 +3,8 @@ from json import dumps, loads
 from pathlib import Path
 
 import svg_timeline.json_serialize as serialize
-from svg_timeline.svg import SvgGroup
-from svg_timeline.timeline import Event
+from svg_timeline.time_spacing import TimeSpacingEvery, TimeSpacingPerYear
+from svg_timeline.timeline import Event, EventDensity, TimeArrow
 
 
 def test_datetime_encoding():
@@ -58,9 +58,32 @@ def test_compilation_invariance():
     decoded_2 = serialize.decode_serialisation(encoded)
     # compare SVGs line by line
     svg_1_lines = decoded.svg.full.split('\n')
-    SvgGroup.id_counters = {}  # reset id-counters
     svg_2_lines = decoded_2.svg.full.split('\n')
     assert len(svg_1_lines) == len(svg_2_lines)
     for svg_1_line, svg_2_line in zip(svg_1_lines, svg_2_lines):
         assert svg_2_line == svg_1_line
 
+
+
+def test_time_spacing_every_encoding():
+    spacing = TimeSpacingEvery(datetime(2024, 1, 1), datetime(2024, 1, 2), unit='minute', step=5,
+                               alignment=datetime(2024, 1, 1, 0, 2))
+    encoded = dumps(spacing, cls=serialize.TimeLineEncoder)
+    decoded = loads(encoded, cls=serialize.TimeLineDecoder)
+    assert repr(decoded) == repr(spacing)
+    assert decoded.dates == spacing.dates
+
+
+def test_time_arrow_settings_round_trip():
+    arrow = TimeArrow(major_tics=TimeSpacingPerYear('2000', '2010', max_tics=5), minor_tics='auto',
+                      auto_major_distance=100, auto_minor_distance=20, downgrade_dense_tics=True)
+    encoded = dumps(arrow, cls=serialize.TimeLineEncoder)
+    decoded = loads(encoded, cls=serialize.TimeLineDecoder)
+    assert repr(decoded) == repr(arrow)
+
+
+def test_event_density_round_trip():
+    density = EventDensity('2000', '2001', [3, 0, 5], lane=2, as_area=True, palette_color=3)
+    encoded = dumps(density, cls=serialize.TimeLineEncoder)
+    decoded = loads(encoded, cls=serialize.TimeLineDecoder)
+    assert decoded == density
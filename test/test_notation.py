@@ -21,3 +21,10 @@ def test_shorthand():
     assert dt('13:43:52') == datetime(today.year, today.month, today.day, 13, 43, 52)
     with pytest.raises(ValueError):
         dt('asdf')
+
+
+def test_shorthand_validation_and_caching():
+    assert dt('1987-09-23T03:23') is dt('1987-09-23T03:23')
+    for invalid in ['1987-13', '1987-02-30', '1987-09-23T25', '198', '1987-9', '1987-09-23 03:23', '13:43:5']:
+        with pytest.raises(ValueError):
+            dt(invalid)
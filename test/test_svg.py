@@ -1,7 +1,13 @@
 """ test cases for the classes defined in the svg module """
+from io import BytesIO, StringIO
+from pathlib import Path
 from textwrap import dedent
+from xml.etree import ElementTree
 
-from svg_timeline.svg import SvgFile, SvgElement
+from pytest import raises
+
+from svg_timeline.json_serialize import load_json
+from svg_timeline.svg import SvgFile, SvgElement, SvgGroup, CascadeStyleSheet, Polyline
 
 
 def test_svg_element_getters():
@@ -80,3 +86,155 @@ def test_svg_footer():
     </svg>
     ''')
     assert svg.footer == dedent(footer)
+
+
+def test_svg_write_to_stream():
+    elements = [
+        SvgGroup([SvgElement('a', {'a1': 'hello'}, 'asdf')], exact_id='outer'),
+        SvgElement('b', {'b1': 'wörld'}),
+        SvgGroup(exact_id='empty'),
+    ]
+    svg = SvgFile(width=800, height=600, elements=elements)
+    text_stream = StringIO()
+    svg.write_to(text_stream)
+    binary_stream = BytesIO()
+    svg.write_to(binary_stream)
+    assert text_stream.getvalue() == svg.full
+    assert binary_stream.getvalue() == svg.full.encode('utf-8')
+    assert svg.element_section in svg.full
+
+
+def test_nested_group_serialization():
+    inner = SvgGroup([SvgElement('a', {'a1': 'hello'}, 'line 1\nline 2')], exact_id='inner')
+    outer = SvgGroup([inner, SvgElement('b'), SvgGroup(exact_id='empty')], exact_id='outer')
+    expected = dedent('''\
+    <g id="outer">
+      <g id="inner">
+        <a a1="hello">line 1
+    line 2</a>
+      </g>
+      <b />
+      <g id="empty" />
+    </g>''')
+    assert str(outer) == expected
+    inner_lines = expected.split('\n')[1:-1]
+    assert outer.content == '\n' + '\n'.join(inner_lines) + '\n'
+
+
+def test_lazy_group_serialization():
+    lazy = SvgGroup((SvgElement(tag) for tag in ['a', 'b']), exact_id='lazy')
+    assert str(lazy) == '<g id="lazy">\n  <a />\n  <b />\n</g>'
+
+
+def _parse_css(css: str) -> dict[str, dict[str, str]]:
+    """ parse the simple CSS written by CascadeStyleSheet.compile """
+    rules = {}
+    for rule in css.split('}')[:-1]:
+        selector, declarations = rule.split('{')
+        selector = ','.join(part.strip() for part in selector.split(','))
+        rules[selector] = dict(
+            tuple(part.strip() for part in declaration.split(':', 1))
+            for declaration in declarations.split(';') if declaration.strip()
+        )
+    return rules
+
+
+def _assert_dom_equal(element_a: ElementTree.Element, element_b: ElementTree.Element):
+    assert element_a.tag == element_b.tag
+    assert element_a.attrib == element_b.attrib
+    if element_a.tag.endswith('style'):
+        assert _parse_css(element_a.text or '') == _parse_css(element_b.text or '')
+    else:
+        assert (element_a.text or '').strip() == (element_b.text or '').strip()
+    assert len(element_a) == len(element_b)
+    for child_a, child_b in zip(element_a, element_b):
+        _assert_dom_equal(child_a, child_b)
+
+
+def test_minified_svg_is_dom_equivalent():
+    json_path = Path(__file__).parent.joinpath('files/emmy_noether.json')
+    plot = load_json(json_path)
+    pretty, minified = StringIO(), StringIO()
+    plot.write_svg(pretty)
+    plot.write_svg(minified, minify=True)
+    assert len(minified.getvalue()) < len(pretty.getvalue())
+    assert '\n' not in minified.getvalue()
+    _assert_dom_equal(ElementTree.fromstring(pretty.getvalue()), ElementTree.fromstring(minified.getvalue()))
+
+
+def test_minified_css():
+    css = CascadeStyleSheet({'circle, rect': {'fill': 'black', 'stroke': 'none'}})
+    minified = css.compile(minify=True)
+    assert 'circle,rect{fill:black;stroke:none}' in minified
+    assert _parse_css(minified) == _parse_css(css.compile(indent='  ', line_break='\n'))
+
+
+def test_css_compilation_is_cached_and_invalidated():
+    css = CascadeStyleSheet()
+    compiled = css.compile(indent='  ')
+    assert css.compile(indent='  ') is compiled
+    assert CascadeStyleSheet().compile(indent='  ') is compiled  # shared between unchanged defaults
+    css['text.custom'] = {'fill': 'red'}
+    changed = css.compile(indent='  ')
+    assert 'text.custom {\n  fill: red;\n}' in changed
+    assert css.compile(indent='  ') is changed
+    del css['text.custom']
+    assert css.compile(indent='  ') == compiled
+    css.update({'path': {'stroke': 'blue'}})
+    assert 'stroke: blue;' in css.compile(indent='  ')
+    assert 'stroke: blue;' not in CascadeStyleSheet().compile(indent='  ')
+
+
+def test_css_in_place_changes_do_not_leak_into_the_defaults():
+    default = CascadeStyleSheet().compile()
+    css = CascadeStyleSheet()
+    css['text']['fill'] = 'red'
+    assert 'fill: red;' in css.compile()
+    assert CascadeStyleSheet().compile() == default
+    css = CascadeStyleSheet()
+    assert css.compile() is default
+    css['text']['fill'] = 'red'
+    assert 'fill: red;' in css.compile()
+    assert CascadeStyleSheet().compile() == default
+
+
+def test_css_validation():
+    with raises(TypeError):
+        CascadeStyleSheet({'path': 'stroke: red'})
+    css = CascadeStyleSheet()
+    with raises(TypeError):
+        css.update({'path': {'stroke-width': 2}})
+    with raises(TypeError):
+        css[1] = {'fill': 'red'}
+
+
+def test_css_pruning():
+    css = CascadeStyleSheet({'circle, rect': {'fill': 'black'}, 'text.title': {'font-size': '20pt'},
+                             '.colored.c02': {'fill': 'red'}, 'svg > g': {'opacity': '1'}})
+    pruned = css.pruned([('circle', []), ('text', ['colored', 'c02'])])
+    assert set(pruned) >= {'circle, rect', '.colored.c02', 'svg > g'}
+    assert 'text.title' not in pruned
+    assert 'text.title' in css
+
+
+def test_pruned_svg_is_dom_equivalent():
+    json_path = Path(__file__).parent.joinpath('files/emmy_noether.json')
+    plot = load_json(json_path)
+    full, pruned = StringIO(), StringIO()
+    plot.write_svg(full)
+    plot.write_svg(pruned, prune_css=True)
+    assert len(pruned.getvalue()) < len(full.getvalue())
+    full_tree, pruned_tree = ElementTree.fromstring(full.getvalue()), ElementTree.fromstring(pruned.getvalue())
+    assert len(full_tree) == len(pruned_tree)
+    for child_full, child_pruned in list(zip(full_tree, pruned_tree))[1:]:
+        _assert_dom_equal(child_full, child_pruned)
+
+
+def test_polyline():
+    """ a polyline is a single path through all of its points """
+    line = Polyline([0, 1.5, 3], [10, 20, 10], classes=['series'])
+    assert str(line) == '<path class="series" d="M0,10 1.5,20 3,10" />'
+    with raises(ValueError):
+        Polyline([0, 1], [0])
+    with raises(ValueError):
+        Polyline([], [])
@@ -2,7 +2,7 @@
 from pathlib import Path
 
 from svg_timeline.vectors import Vector
-from svg_timeline.svg import Line, Text, Rectangle, Circle, Image
+from svg_timeline.svg import Line, Text, Rectangle, Circle, Image, SvgWriter, number_formatter, ImageDataCache
 
 
 def test_line():
@@ -47,3 +47,71 @@ def test_image():
            'AADElEQVQI12P4//8/AAX+Av7czFnnAAAAAElFTkSuQmCC'
            '" />')
     assert str(image) == svg
+
+
+def test_primitives_share_class_strings():
+    classes = ['time_arrow', 'c00', 'major_tic', 'colored']
+    line = Line(source=Vector(0, 0), target=Vector(1, 1), classes=classes)
+    text = Text(coord=Vector(0, 0), text='asdf', classes=list(classes))
+    assert line.attributes['class'] is text.attributes['class']
+    assert not hasattr(line, '__dict__')
+    assert not hasattr(text.coord, '__dict__')
+
+
+def test_attributes_follow_typed_fields():
+    circle = Circle(center=Vector(300, 400), radius=30)
+    circle.radius = 10
+    assert circle.attributes == {'cx': '300', 'cy': '400', 'r': '10'}
+
+
+def test_number_formatter():
+    assert number_formatter()(512.3456789012345) == '512.3456789012345'
+    assert number_formatter(1)(512.3456789012345) == '512.3'
+    assert number_formatter(2)(400.0) == '400'
+    assert number_formatter(2)(-0.001) == '0'
+    assert number_formatter(0)(512.5001) == '513'
+    assert number_formatter(0)(-0.3) == '0'
+    assert number_formatter(-1)(512.3) == '510'
+
+
+def test_quantized_primitives():
+    parts = []
+    writer = SvgWriter(parts.append, decimals=1)
+    writer.write_element(Line(source=Vector(0.04, 1/3), target=Vector(299.96, 400), classes=['a']))
+    writer.write_element(Rectangle(corner1=Vector(-100.123, 0), corner2=Vector(300, 400.55)))
+    assert ''.join(parts) == ('<path class="a" d="M0,0.3 L300,400" />'
+                              '<rect x="-100.1" y="0" width="400.1" height="400.6" />')
+
+
+def test_image_data_cache(tmp_path):
+    image_path = tmp_path / 'pixel.png'
+    image_path.write_bytes(Path(__file__).parent.joinpath('files/single_pixel.png').read_bytes())
+    cache = ImageDataCache()
+    first = cache.get(image_path)
+    second = cache.get(image_path)
+    assert first is second
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.n_bytes == len(first)
+    # a changed file is read again
+    image_path.write_bytes(image_path.read_bytes() + b'\0')
+    assert cache.get(image_path) != first
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 1)
+
+
+def test_image_data_cache_eviction(tmp_path):
+    source = Path(__file__).parent.joinpath('files/single_pixel.png').read_bytes()
+    paths = [tmp_path / f'pixel_{i}.png' for i in range(3)]
+    for path in paths:
+        path.write_bytes(source)
+    entry_size = len(ImageDataCache().get(paths[0]))
+    cache = ImageDataCache(max_bytes=2 * entry_size)
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])  # paths[1] is now the least recently used entry
+    cache.get(paths[2])
+    assert len(cache) == 2
+    assert cache.n_bytes == 2 * entry_size
+    cache.get(paths[0])
+    assert (cache.hits, cache.misses) == (2, 3)
+    cache.get(paths[1])
+    assert (cache.hits, cache.misses) == (2, 4)
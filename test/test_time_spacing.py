@@ -1,10 +1,13 @@
 """ test cases for the classes defined in the time_calculation module """
 from datetime import datetime
 
+from pytest import raises
+
 from svg_timeline.time_spacing import _normalize_month, _normalize_date, _normalize_time
 from svg_timeline.time_spacing import TimeSpacingPerMillennia, TimeSpacingPerCentury, TimeSpacingPerDecade
 from svg_timeline.time_spacing import TimeSpacingPerYear, TimeSpacingPerMonth, TimeSpacingPerWeek, TimeSpacingPerDay
-from svg_timeline.time_spacing import TimeSpacingPerHour, TimeSpacingPerMinute, TimeSpacingPerSecond
+from svg_timeline.time_spacing import TimeSpacingPerHour, TimeSpacingPerMinute, TimeSpacingPerSecond, TimeSpacingEvery
+from svg_timeline.time_spacing import auto_spacing
 
 
 def test_normalize_month():
@@ -256,3 +259,89 @@ def test_string_time_interpretation():
     )
     assert from_string.labels == from_datetime.labels
     assert from_string.dates == from_datetime.dates
+
+
+def test_time_spacing_sequence_access():
+    spacing = TimeSpacingPerMonth('2019-11-15', '2021-03-01')
+    assert len(spacing) == 16
+    assert spacing._dates is None  # counting and indexing do not generate the tics
+    assert spacing[0] == datetime(2019, 12, 1)
+    assert spacing[-1] == datetime(2021, 3, 1)
+    assert spacing[13] == datetime(2021, 1, 1)
+    with raises(IndexError):
+        _ = spacing[16]
+    assert list(spacing) == spacing.dates
+    assert spacing.dates is spacing.dates
+    assert spacing.labels is spacing.labels
+    assert len(TimeSpacingPerWeek('2024-01-02', '2024-01-07')) == 0
+    assert len(TimeSpacingPerDecade('2001', '2009')) == 0
+    hours = TimeSpacingPerHour('2024-01-01T10:30', '2024-01-01T13:00')
+    assert len(hours) == 3
+    assert hours[1] == datetime(2024, 1, 1, 12)
+
+
+def test_fixed_step_spacing_boundaries():
+    # leap day and inclusive end date
+    days = TimeSpacingPerDay('2020-02-27T12', '2020-03-02')
+    assert days.labels == ['28', '29', '1', '2']
+    assert days[-1] == datetime(2020, 3, 2)
+    # day overflow at midnight of new year's eve
+    seconds = TimeSpacingPerSecond(datetime(2020, 12, 31, 23, 59, 58, 500), '2021-01-01T00:00:01')
+    assert seconds.dates == [
+        datetime(2020, 12, 31, 23, 59, 59),
+        datetime(2021, 1, 1, 0, 0, 0),
+        datetime(2021, 1, 1, 0, 0, 1),
+    ]
+    assert len(TimeSpacingPerSecond('2021-01-01T00:00:01', '2021-01-02T00:00:00')) == 86_399
+
+
+def test_time_spacing_every():
+    milliseconds = TimeSpacingEvery('2024-01-01T10:00', '2024-01-01T10:00:01', unit='millisecond', step=250)
+    assert milliseconds.labels == ['10:00:00.250', '10:00:00.500', '10:00:00.750', '10:00:01.000']
+    hours = TimeSpacingEvery('2024-01-01T10', '2024-01-02', unit='hour', step=6)
+    assert hours.dates == [datetime(2024, 1, 1, 12), datetime(2024, 1, 1, 18), datetime(2024, 1, 2)]
+    assert hours.labels == ['12:00', '18:00', '00:00']
+    quarters = TimeSpacingEvery('2023-11-15', '2024-12-31', unit='month', step=3)
+    assert quarters.labels == ['Jan', 'Apr', 'Jul', 'Oct']
+    assert quarters[-1] == datetime(2024, 10, 1)
+    # the fixed spacings are special cases
+    assert TimeSpacingEvery('1523', '2105', unit='year', step=100).dates == TimeSpacingPerCentury('1523', '2105').dates
+    weeks = TimeSpacingEvery('2024-01-03', '2024-03-01', unit='week')
+    assert weeks.dates == TimeSpacingPerWeek('2024-01-03', '2024-03-01').dates
+    assert weeks.labels == TimeSpacingPerWeek('2024-01-03', '2024-03-01').labels
+
+
+def test_time_spacing_every_alignment():
+    minutes = TimeSpacingEvery('2024-01-01T10:00', '2024-01-01T10:06', unit='minute', step=2,
+                               alignment='2024-01-01T00:00:30')
+    assert minutes.labels == ['10:00:30', '10:02:30', '10:04:30']
+    months = TimeSpacingEvery('2024-01-15', '2025-01-01', unit='month', step=6, alignment='2000-03')
+    assert months.labels == ['Mar', 'Sep']
+    microseconds = TimeSpacingEvery(datetime(2024, 1, 1), datetime(2024, 1, 1, 0, 0, 0, 10), unit='microsecond', step=3)
+    assert microseconds.labels == ['00:00:00.000003', '00:00:00.000006', '00:00:00.000009']
+    with raises(ValueError):
+        TimeSpacingEvery('2024', '2025', unit='fortnight')
+    with raises(ValueError):
+        TimeSpacingEvery('2024', '2025', unit='day', step=0)
+
+
+def test_auto_spacing():
+    major = auto_spacing('1900', '2020', length=1000, min_distance=80)
+    assert (major.unit, major.step) == ('year', 10)
+    minor = auto_spacing('1900', '2020', length=1000, min_distance=15, divides=major)
+    assert (minor.unit, minor.step) == ('year', 2)
+    day = auto_spacing('2024-01-01', '2024-01-02', length=1000, min_distance=80)
+    assert (day.unit, day.step) == ('hour', 2)
+    assert len(auto_spacing(datetime(1, 1, 1), datetime(9000, 1, 1), length=1000)) <= 12
+
+
+def test_max_tics():
+    spacing = TimeSpacingPerSecond('2000', '2010')
+    assert len(spacing) == 315_619_200
+    with raises(ValueError):
+        _ = spacing.dates
+    small = TimeSpacingPerYear('2000', '2010', max_tics=5)
+    with raises(ValueError):
+        _ = small.dates
+    clipped = small.clipped(datetime(2001, 6, 1), datetime(2005, 6, 1))
+    assert clipped.max_tics == 5 and len(clipped.dates) == 4
@@ -1,8 +1,17 @@
+import gzip
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from io import StringIO
+from pathlib import Path
 
 from pytest import raises
 
-from svg_timeline.timeline import ConnectedEvents
+from svg_timeline.svg import Image, Polyline
+from svg_timeline.time_spacing import TimeSpacingPerSecond, TimeSpacingPerYear
+from svg_timeline.timeline import ConnectedEvents, DatedImage, Event, EventCluster, EventDensity, FragmentCache
+from svg_timeline.timeline import TimeArrow, TimelinePlot, TimeSpan, Title
+from svg_timeline.timeline_geometry import TimeLineGeometry
+from svg_timeline.vectors import Vector
 
 
 def test_connected_events_raises_on_length():
@@ -25,3 +34,320 @@ def test_connected_events_raises_on_length():
         _ = ConnectedEvents(dates=[date_1, date_2], labels=['adsf', 'asdfas'], individual_classes=[])
     with raises(ValueError):
         _ = ConnectedEvents(dates=[date_1, date_2], labels=['adsf', 'asdfas'], individual_classes=[['color_a']])
+
+
+def test_write_svg_matches_svg():
+    """ streaming a plot should give the same document as the materialized SVG """
+    geometry = TimeLineGeometry('2000', '2010')
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(TimeArrow(major_tics=TimeSpacingPerYear(geometry.first, geometry.last)))
+    plot.add_element(Event('2005', 'an event'), layer=2)
+    stream = StringIO()
+    plot.write_svg(stream)
+    assert stream.getvalue() == plot.svg.full
+
+
+def test_save_compressed(tmp_path):
+    """ .svgz files are written gzip compressed, other files only on request """
+    geometry = TimeLineGeometry('2000', '2010')
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(Event('2005', 'an event'))
+    contents = []
+    for file_name, compress, compresslevel in [('plot.svg', None, 9), ('plot.svgz', None, 9), ('forced.svg', True, 1)]:
+        plot.save(tmp_path / file_name, compress=compress, compresslevel=compresslevel)
+        contents.append((tmp_path / file_name).read_bytes())
+    plain, svgz, forced = contents
+    assert plain.startswith(b'<?xml')
+    assert gzip.decompress(svgz) == plain
+    assert gzip.decompress(forced) == plain
+
+
+def test_repeated_images_are_defined_once():
+    image_path = Path(__file__).parent.joinpath('files/single_pixel.png')
+    geometry = TimeLineGeometry('2000', '2010')
+    plot = TimelinePlot(geometry=geometry)
+    for year in ['2002', '2004', '2006']:
+        plot.add_element(DatedImage.from_path(year, image_path, width=20, height=10))
+    image_data = Image.xlink_href_from_file_path(image_path)
+    stream = StringIO()
+    plot.write_svg(stream)
+    svg = stream.getvalue()
+    assert svg.count(image_data) == 1
+    assert svg.count('<use ') == 3
+    assert '<symbol id="image_data_001">' in svg
+    assert 'xlink:href="#image_data_001"' in svg
+    assert plot.svg.full.count(image_data) == 1
+    # a single image is still embedded directly
+    single = TimelinePlot(geometry=geometry)
+    single.add_element(DatedImage.from_path('2002', image_path, width=20, height=10))
+    assert '<use ' not in single.svg.full
+    assert single.svg.full.count(image_data) == 1
+
+
+def test_renders_are_deterministic_and_thread_safe():
+    """ group IDs are counted per render, also when rendering concurrently """
+    geometry = TimeLineGeometry('2000', '2010')
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(TimeArrow(major_tics=TimeSpacingPerYear(geometry.first, geometry.last)))
+    for year in range(2001, 2010):
+        plot.add_element(Event(str(year), f'event {year}'), layer=2)
+
+    def render(_) -> str:
+        stream = StringIO()
+        plot.write_svg(stream)
+        return stream.getvalue()
+
+    first = render(None)
+    assert render(None) == first
+    assert 'id="event_001"' in first
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(output == first for output in executor.map(render, range(32)))
+
+
+def test_svg_is_idempotent_and_cached_per_layer():
+    """ rendering does not change the plot and only re-renders layers that were changed """
+    geometry = TimeLineGeometry('2000', '2010')
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(TimeArrow(major_tics=TimeSpacingPerYear(geometry.first, geometry.last)), layer=0)
+    plot.add_element(Event('2003', 'first event'), layer=1)
+    plot.add_element(Event('2005', 'second event'), layer=2)
+    first = plot.svg
+    assert len(plot.layers[0]) == 1
+    second = plot.svg
+    assert second.full == first.full
+    assert all(layer_2 is layer_1 for layer_1, layer_2 in zip(first.elements, second.elements))
+    plot.add_element(Event('2007', 'third event'), layer=2)
+    third = plot.svg
+    assert third.elements[0] is first.elements[0]
+    assert third.elements[1] is first.elements[1]
+    assert third.elements[2] is not first.elements[2]
+    assert 'id="event_003"' in third.full
+    stream = StringIO()
+    plot.write_svg(stream)
+    assert stream.getvalue() == third.full
+    uncached = TimelinePlot(geometry=geometry, layers=plot.layers)
+    assert uncached.svg.full == third.full
+    plot.add_element(Event('2001', 'shifts the IDs of layer 2'), layer=1)
+    fourth = plot.svg
+    assert fourth.elements[2] is not third.elements[2]
+    assert fourth.full == TimelinePlot(geometry=geometry, layers=plot.layers).svg.full
+
+
+def test_fragment_cache_is_shared_between_plots():
+    """ equal elements on plots with equal geometry are rendered only once """
+    fragment_cache = FragmentCache()
+    outputs = []
+    for user in ['first user', 'second user']:
+        geometry = TimeLineGeometry('2000', '2010')
+        plot = TimelinePlot(geometry=geometry, fragment_cache=fragment_cache)
+        plot.add_element(Title('shared title'), layer=0)
+        plot.add_element(TimeArrow(major_tics=TimeSpacingPerYear(geometry.first, geometry.last)), layer=0)
+        plot.add_element(Event('2005', user))
+        plot.add_element(Event('2007', 'shared event'))
+        uncached = TimelinePlot(geometry=geometry, layers=plot.layers)
+        outputs.append(plot.svg.full)
+        assert outputs[-1] == uncached.svg.full
+    assert outputs[0] != outputs[1]
+    assert fragment_cache.misses == 6  # 5 elements of the first plot, 1 of the second
+    assert fragment_cache.hits == 4
+    fragment_cache.clear()
+    assert len(fragment_cache) == 0 and fragment_cache.hits == 0
+
+
+def test_string_dates_are_parsed_once():
+    """ elements store their dates as datetime objects """
+    assert Event('2005-03', 'an event').date == datetime(2005, 3, 1)
+    assert ConnectedEvents(['2001', datetime(2002, 1, 1)], ['a', 'b']).dates == [datetime(2001, 1, 1), datetime(2002, 1, 1)]
+
+
+def test_time_arrow_auto_tics():
+    """ automatic tics fit the geometry, dense tics are only replaced on request """
+    geometry = TimeLineGeometry('2000', '2010')
+    major, minor = TimeArrow(minor_tics='auto').spacings(geometry)
+    assert minor is not None
+    assert len(major) == 10 and len(minor) == 60  # every year and every second month
+    dense = TimeArrow(major_tics=TimeSpacingPerYear(geometry.first, geometry.last),
+                      minor_tics=TimeSpacingPerSecond(geometry.first, geometry.last))
+    with raises(ValueError):
+        dense.svg(geometry)
+    key = FragmentCache.key(dense, geometry)
+    dense.downgrade_dense_tics = True
+    assert FragmentCache.key(dense, geometry) != key
+    _, minor = dense.spacings(geometry)
+    assert minor is not None and len(minor) == 60
+    with raises(ValueError):
+        TimeArrow(major_tics='daily')
+
+
+def test_render_window():
+    """ a window only contains the elements within its time range """
+    geometry = TimeLineGeometry('2000', '2010')
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(Title('a plot'), layer=0)
+    plot.add_element(TimeArrow(major_tics=TimeSpacingPerYear(geometry.first, geometry.last)), layer=0)
+    for year in range(2000, 2010):
+        plot.add_element(Event(f'{year}-07', f'event {year}'))
+    plot.add_element(TimeSpan('2001', '2008', 'a long span'), layer=2)
+    plot.add_element(ConnectedEvents(['2000', '2002', '2004', '2006', '2008'], ['a', 'b', 'c', 'd', 'e']), layer=3)
+    window = plot.render_window('2003-01-01', '2005-01-01')
+    assert window.geometry.first == datetime(2003, 1, 1)
+    assert [type(element) for element in window.layers[0]] == [Title, TimeArrow]
+    assert window.layers[1] == [Event('2003-07', 'event 2003'), Event('2004-07', 'event 2004')]
+    span, = window.layers[2]
+    assert span.time_extent() == (datetime(2003, 1, 1), datetime(2005, 1, 1))
+    connected, = window.layers[3]
+    assert isinstance(connected, ConnectedEvents) and connected.labels == ['b', 'c', 'd']
+    arrow = window.layers[0][1]
+    assert isinstance(arrow, TimeArrow)
+    assert arrow.spacings(window.geometry)[0].dates == [datetime(2004, 1, 1), datetime(2005, 1, 1)]
+    assert 'event 2003' in window.svg.full
+    plot.add_element(Event('2004-02', 'added later'))
+    assert len(plot.render_window('2003-01-01', '2005-01-01').layers[1]) == 3
+
+
+def test_elements_between_and_element_at():
+    """ time range queries and hit testing on a plot """
+    geometry = TimeLineGeometry('2000', '2010')
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(Title('a plot'), layer=0)
+    span = TimeSpan('2001', '2008', 'a long span', lane=2)
+    plot.add_element(span, layer=2)
+    events = [Event(f'{year}-07', f'event {year}') for year in range(2000, 2010)]
+    for event in events:
+        plot.add_element(event)
+    assert plot.elements_between('2003', '2005') == [events[3], events[4], span]
+    added_later = Event('2003-02', 'added later', lane=2)
+    plot.add_element(added_later, layer=3)
+    assert len(plot.elements_between('2003', '2005')) == 4
+    event_coord = geometry.as_coord(datetime(2004, 7, 1), lane=1)
+    assert plot.element_at(event_coord) is events[4]
+    assert plot.element_at(event_coord + Vector(3, 0)) is events[4]
+    assert plot.element_at(event_coord + Vector(0, -geometry.settings.lane_height)) is span
+    assert plot.element_at(geometry.as_coord(datetime(2003, 2, 1), lane=2)) is added_later
+    assert plot.element_at(geometry.as_coord(datetime(2004, 1, 1), lane=1)) is None
+    assert plot.element_at(geometry.as_coord(datetime(2004, 7, 1), lane=5)) is None
+
+
+def test_dense_events_are_clustered():
+    """ events within one bin of a lane are drawn as a single cluster, sparse events are kept """
+    geometry = TimeLineGeometry('2000', '2010')
+    plot = TimelinePlot(geometry=geometry)
+    for hour in range(100):
+        plot.add_element(Event(datetime(2005, 1, 1, hour // 24, hour % 24), f'dense {hour}'))
+    plot.add_element(Event(datetime(2005, 1, 2), 'other lane', lane=2))
+    plot.add_element(Event('2008', 'sparse'))
+    unclustered = plot.svg.full
+    assert unclustered.count('<circle') == 102
+    plot.cluster_width = 10
+    clustered = plot.svg.full
+    assert clustered.count('<circle') == 3
+    assert '100 events' in clustered and 'other lane' in clustered and 'sparse' in clustered
+    assert 'class="event event_cluster c00 colored"' in clustered
+    assert plot.render_window('2004', '2006').cluster_width == 10
+    plot.cluster_min_events = 101
+    assert plot.svg.full == unclustered
+    cluster = EventCluster.from_events([Event('2001', 'a', palette_color=1), Event('2002', 'b', palette_color=1)])
+    assert cluster.time_extent() == (datetime(2001, 1, 1), datetime(2002, 1, 1))
+    assert cluster.count == 2 and cluster.palette_color == 1
+
+
+def test_connected_events_as_downsampled_path():
+    """ long series can be drawn as one path with only the events that are visible at the resolution """
+    geometry = TimeLineGeometry('2000', '2001')
+    n_dates = 10_000
+    step = (geometry.last - geometry.first) / n_dates
+    dates = [geometry.first + i * step for i in range(n_dates)]
+    labels = [None] * n_dates
+    labels[5000] = 'mid-year'
+    series = ConnectedEvents(dates, labels, palette_colors=2)
+    per_event = series.svg(geometry)
+    assert len(list(per_event.elements)) == n_dates
+    series.as_path = True
+    path = series.svg(geometry)
+    line, circle, text = path.elements
+    assert isinstance(line, Polyline) and line.tag == 'path' and len(line.xs) == n_dates
+    assert 'c02' in line.classes and text.content == 'mid-year'
+    series.downsample = True
+    indices = series.visible_indices(geometry)
+    assert 5000 in indices and indices[0] == 0 and indices[-1] == n_dates - 1
+    assert len(indices) <= 2 * geometry.width + 1
+    downsampled, = [element for element in series.svg(geometry).elements if element.tag == 'path']
+    assert isinstance(downsampled, Polyline) and len(downsampled.xs) == len(indices)
+    series.as_path = False
+    assert len(list(series.svg(geometry).elements)) == len(indices)
+
+
+def test_event_density():
+    """ timestamps are counted into pixel aligned bins and drawn as one path """
+    geometry = TimeLineGeometry('2000', '2010')
+    timestamps = (datetime(2009 - i % 10, 3 + i % 6, 1) for i in range(10_000))
+    density = EventDensity.from_timestamps(timestamps, geometry, bin_width=geometry.axis_length / 10, lane=2)
+    assert density.counts == [1000] * 10
+    assert density.time_extent() == (datetime(2000, 1, 1), datetime(2010, 1, 1))
+    bars, = density.svg(geometry).elements
+    assert bars.tag == 'path' and len(bars.xs) == 2 * 10 + 2
+    assert 'event_density' in bars.classes and 'colored' in bars.classes
+    top = geometry.as_coord(datetime(2000, 1, 1), lane=2 + 0.8)
+    assert (bars.xs[1], bars.ys[1]) == (top.x, top.y)
+    density.as_area = True
+    area, = density.svg(geometry).elements
+    assert len(area.xs) == 10 + 2
+    clipped = density.clipped(datetime(2003, 6, 1), datetime(2005, 6, 1))
+    assert clipped.counts == [1000] * 3 and clipped.max_count == 1000
+    assert clipped.start_date == density.start_date + 3 * (density.end_date - density.start_date) / 10
+    # windows that only touch the first or the last date keep the bin at that date
+    assert density.clipped(datetime(2010, 1, 1), datetime(2011, 1, 1)).counts == [1000]
+    assert density.clipped(datetime(1999, 1, 1), datetime(2000, 1, 1)).counts == [1000]
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(EventDensity('2000', '2010', [1, 2, 3]))
+    edge, = plot.render_window('2010', '2011').layers[1]
+    assert isinstance(edge, EventDensity)
+    assert edge.counts == [3] and edge.end_date == datetime(2010, 1, 1)
+    with raises(ValueError):
+        EventDensity('2001', '2000', [1])
+    with raises(ValueError):
+        EventDensity('2000', '2001', [])
+
+
+def test_empty_connected_events_are_undated():
+    """ an empty series has no time extent, but can still be added and rendered """
+    geometry = TimeLineGeometry('2000', '2010')
+    empty = ConnectedEvents([], [])
+    assert empty.time_extent() is None
+    plot = TimelinePlot(geometry=geometry)
+    plot.add_element(empty)
+    event = Event('2005', 'an event')
+    plot.add_element(event)
+    assert plot.elements_between('2000', '2010') == [event]
+    assert plot.render_window('2004', '2006').layers[1][0] is empty
+    plot.add_element(ConnectedEvents([], []))
+    assert 'an event' in plot.svg.full
+
+
+def test_time_index_stays_consistent_on_errors():
+    """ an element without a valid time extent neither breaks the index nor the layer """
+    class BrokenEvent(Event):
+        def time_extent(self):
+            raise RuntimeError("no extent")
+
+    geometry = TimeLineGeometry('2000', '2010')
+    event = Event('2005', 'an event')
+    plot = TimelinePlot(geometry=geometry, layers={1: [BrokenEvent('2003', 'broken'), event]})
+    for _ in range(2):
+        with raises(RuntimeError):
+            plot.elements_between('2000', '2010')
+    plot.layers[1].pop(0)
+    plot.invalidate(1)
+    assert plot.elements_between('2000', '2010') == [event]
+    with raises(RuntimeError):
+        plot.add_element(BrokenEvent('2004', 'broken'))
+    assert plot.layers[1] == [event]
+    assert plot.elements_between('2000', '2010') == [event]
+    # spans with reversed dates are indexed by their extent, whether the index is built already or not
+    reversed_span = TimeSpan('2006', '2004', 'reversed')
+    plot.add_element(reversed_span)
+    assert plot.elements_between('2005-06', '2005-07') == [reversed_span]
+    late_span = TimeSpan('2009', '2008', 'reversed late')
+    plot.add_element(late_span, layer=2)
+    assert plot.elements_between('2008-06', '2008-07') == [late_span]
+    assert reversed_span.time_extent() == (datetime(2004, 1, 1), datetime(2006, 1, 1))
@@ -1,7 +1,7 @@
 """ test cases for the classes defined in the timeline_geometry module """
 from datetime import datetime
 
-from pytest import fixture
+from pytest import fixture, importorskip, raises
 
 from svg_timeline.vectors import Vector
 from svg_timeline.timeline_geometry import TimeGradient, TimeLineGeometry
@@ -135,3 +135,51 @@ def test_init_timelinegeometry_from_string():
     assert from_date.last == from_str.last
     assert from_date.as_coord(__DATE_HALF) == from_str.as_coord(__DATESTR_HALF)
     assert from_date.as_coord(__DATESTR_HALF) == from_str.as_coord(__DATE_HALF)
+
+
+def test_timelinegeometry_as_coords():
+    geometry = TimeLineGeometry(__DATE_START, __DATE_END)
+    dates = [__DATE_MINUS_ONE, __DATESTR_START, __DATE_HALF, __DATESTR_END, __DATE_PLUS_POINT_TWO]
+    lanes = [0, 1, -2, 0.5, 3]
+    xs, ys = geometry.as_coords(dates, lanes)
+    for date, lane, x, y in zip(dates, lanes, xs, ys):
+        coord = geometry.as_coord(date, lane=lane)
+        assert (x, y) == (coord.x, coord.y)
+    xs, ys = geometry.as_coords(dates, lanes=2)
+    assert list(ys) == [geometry.as_coord(__DATE_START, lane=2).y] * len(dates)
+    with raises(ValueError):
+        geometry.as_coords(dates, lanes=[1, 2])
+
+
+def test_timelinegeometry_inverse_transform():
+    geometry = TimeLineGeometry(__DATE_START, __DATE_END)
+    for date in [__DATE_MINUS_ONE, __DATE_START, __DATE_HALF, __DATE_END, __DATE_PLUS_POINT_TWO]:
+        for lane in [-2, 0, 0.5, 3]:
+            coord = geometry.as_coord(date, lane=lane)
+            assert abs(geometry.coord_to_lane(coord) - lane) < 1e-9
+            assert abs((geometry.coord_to_date(coord) - date).total_seconds()) < 1e-3
+    assert geometry.coord_to_relative(geometry.as_coord(__DATE_HALF, lane=5)) == 0.5
+
+
+def test_timelinegeometry_histogram():
+    geometry = TimeLineGeometry(__DATE_START, __DATE_END)
+    dates = (date for date in [__DATE_END, __DATE_HALF, __DATESTR_START, __DATE_MINUS_ONE, __DATE_PLUS_POINT_TWO])
+    assert geometry.histogram(dates, n_bins=4) == [1, 0, 1, 1]
+    assert geometry.histogram([__DATE_START, __DATE_HALF], n_bins=1) == [2]
+    assert geometry.histogram([], n_bins=2) == [0, 0]
+    with raises(ValueError):
+        geometry.histogram([], n_bins=0)
+    assert geometry.axis_length == (geometry.as_coord(__DATE_END) - geometry.as_coord(__DATE_START)).mag
+
+
+def test_timelinegeometry_numpy_arrays():
+    """ NumPy datetime64 arrays give the same results as lists of datetime objects """
+    numpy = importorskip('numpy')
+    geometry = TimeLineGeometry(__DATE_START, __DATE_END)
+    dates = [__DATE_MINUS_ONE, __DATE_START, __DATE_HALF, __DATE_END, __DATE_PLUS_POINT_TWO]
+    array = numpy.array(dates, dtype='datetime64[us]')
+    xs, ys = geometry.as_coords(array, lanes=2)
+    expected_xs, expected_ys = geometry.as_coords(dates, lanes=2)
+    assert numpy.allclose(xs, expected_xs) and numpy.allclose(ys, expected_ys)
+    for n_bins in [1, 3, 4]:
+        assert geometry.histogram(array, n_bins) == geometry.histogram(dates, n_bins)